@@ -290,13 +290,31 @@ class HistoricalDataManager:
 
         # Group by date
         merged_df['date'] = pd.to_datetime(merged_df['timestamp']).dt.date
-        dates = sorted(merged_df['date'].unique())
+        # date -> row positions, built in one pass (no full-frame mask per day)
+        day_rows = merged_df.groupby('date', sort=True).indices
+        dates = list(day_rows)
+
+        # Strike table for the whole range in one call when the calculator
+        # provides a vectorised .batch(spots, vixes, dates) form
+        strike_table = None
+        batch_calculator = getattr(strike_calculator, 'batch', None)
+        if batch_calculator is not None:
+            openings = merged_df.drop_duplicates('date')
+            ce_arr, pe_arr, expiry_arr = batch_calculator(
+                openings['nifty_spot'].to_numpy(dtype=np.float64),
+                openings['india_vix'].to_numpy(dtype=np.float64),
+                np.array(openings['date'].tolist(), dtype='datetime64[D]')
+            )
+            strike_table = {
+                d: (int(ce), int(pe), exp.item())
+                for d, ce, pe, exp in zip(openings['date'], ce_arr, pe_arr, expiry_arr)
+            }
 
         for current_date in dates:
             logging.info(f"Processing {current_date} ({current_date.strftime('%A')})")
 
             # Get data for this day
-            daily_data = merged_df[merged_df['date'] == current_date].copy()
+            daily_data = merged_df.iloc[day_rows[current_date]].copy()
 
             if daily_data.empty:
                 continue
@@ -306,7 +324,10 @@ class HistoricalDataManager:
             opening_vix = daily_data.iloc[0]['india_vix']
 
             # CRITICAL: Get strikes AND the EXACT expiry from strike_calculator
-            ce_strike, pe_strike, target_expiry = strike_calculator(opening_spot, opening_vix, current_date)
+            if strike_table is not None:
+                ce_strike, pe_strike, target_expiry = strike_table[current_date]
+            else:
+                ce_strike, pe_strike, target_expiry = strike_calculator(opening_spot, opening_vix, current_date)
 
             logging.info(
                 f"  Target Strikes: CE={ce_strike}, PE={pe_strike}"
@@ -5,15 +5,35 @@ run.py - ENHANCED with Trade Reconciliation
 
 import sys
 import time
+import atexit
+import importlib.util
+import queue
 import logging
-from datetime import datetime, date
-from typing import Tuple
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from typing import Optional, Tuple
 import pandas as pd
 import numpy as np
-from colorama import Fore, Style
-from tabulate import tabulate
+from colorama import Fore, Style, init as colorama_init
 import os
 import shutil
+from pathlib import Path
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when numba isn't installed"""
+        def decorator(func):
+            return func
+        return decorator
+
+# Checked without importing: pyarrow is heavy and only needed for the backtest export
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
 
 from historical_data_manager import HistoricalDataManager
 
@@ -30,30 +50,66 @@ from strangle import (
     Direction
 )
 
-# Create directories
-os.makedirs(Config.LOG_DIR_MAIN, exist_ok=True)
-os.makedirs(Config.LOG_DIR_CSV, exist_ok=True)
-os.makedirs(Config.LOG_DIR_AUDIT, exist_ok=True)
-os.makedirs(Config.OUTPUT_DIR_DATA, exist_ok=True)
-os.makedirs(Config.OUTPUT_DIR_TRADES, exist_ok=True)
-os.makedirs(Config.OUTPUT_DIR_PERF, exist_ok=True)
-os.makedirs(Config.OUTPUT_DIR_SUMMARY, exist_ok=True)
+_log = logging.getLogger(__name__)
+
+# Restored-trade line template, bound once at import
+_TRADE_LINE = (
+    "  {ot} {sp:.0f} | Entry: ₹{entry:.2f} → Current: ₹{cur:.2f} | "
+    "P&L: {color}₹{pnl:+,.2f} ({pct:+.1f}%)" + Style.RESET_ALL
+).format
+
+_RUNTIME_DIRS = (
+    Config.LOG_DIR_MAIN, Config.LOG_DIR_CSV, Config.LOG_DIR_AUDIT,
+    Config.OUTPUT_DIR_DATA, Config.OUTPUT_DIR_TRADES,
+    Config.OUTPUT_DIR_PERF, Config.OUTPUT_DIR_SUMMARY,
+)
+
+
+def _ensure_dirs():
+    """Create log/output directories on startup (not at import time)."""
+    for directory in map(Path, _RUNTIME_DIRS):
+        if not directory.is_dir():
+            directory.mkdir(parents=True, exist_ok=True)
+
+
+_log_listener: Optional[QueueListener] = None
+
+
+def _stop_log_listener():
+    """Flush queued records and stop the background logging thread."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
 
 
 def setup_logging():
-    """Sets up the logging configuration."""
+    """
+    Sets up the logging configuration.
+    Callers only enqueue records; a QueueListener thread does the file/console writes.
+    """
+    global _log_listener
+
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+    _stop_log_listener()
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(Config.LOG_FILE, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(Config.LOG_FILE, encoding='utf-8')
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    root_logger.addHandler(QueueHandler(log_queue))
+    root_logger.setLevel(logging.INFO)
+
+    _log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _log_listener.start()
 
 
 def reconcile_active_trades_from_db(db: DatabaseManager, trade_manager: TradeManager,
@@ -68,35 +124,47 @@ def reconcile_active_trades_from_db(db: DatabaseManager, trade_manager: TradeMan
         all_trades = db.get_all_trades()
 
         if all_trades.empty:
-            logging.info("No trades found in database")
+            _log.info("No trades found in database")
             return 0
 
         # Filter for trades without exit_time (still active)
         active_trades_df = all_trades[all_trades['exit_time'].isna()]
 
         if active_trades_df.empty:
-            logging.info("No active trades found in database")
+            _log.info("No active trades found in database")
             return 0
 
-        logging.info(f"Found {len(active_trades_df)} active trades in database")
+        _log.info("Found %d active trades in database", len(active_trades_df))
 
         restored_count = 0
 
-        for _, row in active_trades_df.iterrows():
+        # Parse columns once for the whole frame instead of per row
+        active_trades_df = active_trades_df.assign(
+            entry_time=pd.to_datetime(active_trades_df['entry_time'], errors='coerce'),
+            qty=pd.to_numeric(active_trades_df['qty'], errors='coerce'),
+            entry_price=pd.to_numeric(active_trades_df['entry_price'], errors='coerce'),
+            strike_price=pd.to_numeric(active_trades_df['strike_price'], errors='coerce'),
+        )
+        # One quote request for every open symbol
+        current_prices = broker.get_batch_quotes(active_trades_df['symbol'].unique().tolist())
+
+        for row in active_trades_df.itertuples(index=False):
             try:
                 # Parse trade data
-                trade_id = row['trade_id']
-                symbol = row['symbol']
-                qty = int(row['qty'])
-                direction = Direction.SELL if row['direction'] == 'SELL' else Direction.BUY
-                entry_price = float(row['entry_price'])
-                entry_time = pd.to_datetime(row['entry_time'])
-                option_type = row['option_type']
-                strike_price = float(row['strike_price'])
+                trade_id = row.trade_id
+                symbol = row.symbol
+                qty = int(row.qty)
+                direction = Direction.SELL if row.direction == 'SELL' else Direction.BUY
+                entry_price = float(row.entry_price)
+                entry_time = row.entry_time
+                if pd.isna(entry_time):
+                    raise ValueError("unparseable entry_time")
+                option_type = row.option_type
+                strike_price = float(row.strike_price)
 
                 # Get expiry and spot at entry
                 # Note: You may need to adjust this based on your database schema
-                expiry = entry_time.date() + pd.Timedelta(days=7)  # Estimate
+                expiry = entry_time.date() + timedelta(days=7)  # Estimate
                 spot_at_entry = strike_price  # Estimate
 
                 # Create Trade object
@@ -118,37 +186,38 @@ def reconcile_active_trades_from_db(db: DatabaseManager, trade_manager: TradeMan
                 trade_manager.active_trades[trade_id] = trade
 
                 # Get current price
-                current_price = broker.get_quote(symbol)
+                current_price = current_prices.get(symbol, 0.0)
                 if current_price > 0:
                     trade.update_price(current_price)
 
                 restored_count += 1
 
-                logging.info(
-                    f"✓ Restored trade: {symbol} | Entry: ₹{entry_price:.2f} | "
-                    f"Current: ₹{current_price:.2f}"
-                )
+                _log.info("✓ Restored trade: %s | Entry: ₹%.2f | Current: ₹%.2f",
+                          symbol, entry_price, current_price)
 
             except Exception as e:
-                logging.error(f"Failed to restore trade {row.get('trade_id', 'unknown')}: {e}")
+                _log.error("Failed to restore trade %s: %s", getattr(row, 'trade_id', 'unknown'), e)
                 continue
 
+        # Restored trades bypass add_trade, so rebuild the cached open P&L
+        trade_manager.resync_unrealized_pnl()
+
         if restored_count > 0:
             print(f"\n{Fore.GREEN}{'=' * 80}{Style.RESET_ALL}")
             print(f"{Fore.GREEN}✓ RESTORED {restored_count} ACTIVE TRADES FROM DATABASE{Style.RESET_ALL}")
             print(f"{Fore.GREEN}{'=' * 80}{Style.RESET_ALL}\n")
 
-            # Show restored trades
-            for trade_id, trade in trade_manager.active_trades.items():
+            # Show restored trades (built in one pass, single write)
+            trade_lines = []
+            for trade in trade_manager.active_trades.values():
                 pnl = trade.get_pnl()
-                pnl_pct = trade.get_pnl_pct()
-                color = Fore.GREEN if pnl >= 0 else Fore.RED
-
-                print(
-                    f"  {trade.option_type} {trade.strike_price:.0f} | "
-                    f"Entry: ₹{trade.entry_price:.2f} → Current: ₹{trade.current_price:.2f} | "
-                    f"P&L: {color}₹{pnl:+,.2f} ({pnl_pct:+.1f}%){Style.RESET_ALL}"
-                )
+                trade_lines.append(_TRADE_LINE(
+                    ot=trade.option_type, sp=trade.strike_price,
+                    entry=trade.entry_price, cur=trade.current_price,
+                    color=Fore.GREEN if pnl >= 0 else Fore.RED,
+                    pnl=pnl, pct=trade.get_pnl_pct()
+                ))
+            print('\n'.join(trade_lines))
 
             print(f"\n{Fore.YELLOW}Continuing to monitor these positions...{Style.RESET_ALL}\n")
             time.sleep(3)  # Give user time to see
@@ -156,12 +225,80 @@ def reconcile_active_trades_from_db(db: DatabaseManager, trade_manager: TradeMan
         return restored_count
 
     except Exception as e:
-        logging.error(f"Failed to reconcile trades from database: {e}", exc_info=True)
+        _log.error("Failed to reconcile trades from database: %s", e, exc_info=True)
         return 0
 
 
+_EXPIRY_CUTOFF_MINUTE = 15 * 60 + 30  # same-day expiry rolls to next week after the close
+
+
+@njit("UniTuple(int64, 3)(float64, float64, int64, int64, int64)", cache=True)
+def _strike_kernel(spot, vix, weekday, minute_of_day, min_dte):
+    """(ce_strike, pe_strike, days_to_expiry) for one opening spot/VIX and weekday"""
+    if vix > 20:
+        otm_distance = 450
+    elif vix > 15:
+        otm_distance = 400
+    else:
+        otm_distance = 350
+    base = np.int64(np.rint(spot / 50.0)) * 50  # rint rounds half to even, like round()
+
+    days_until_tuesday = (1 - weekday) % 7
+    if days_until_tuesday == 0 and minute_of_day >= _EXPIRY_CUTOFF_MINUTE:
+        days_until_tuesday = 7
+    if days_until_tuesday < min_dte:
+        days_until_tuesday += 7
+    return base + otm_distance, base - otm_distance, days_until_tuesday
+
+
+@njit(cache=True)
+def _strikes_kernel(spots, vixes, weekdays, minutes_of_day, min_dte):
+    """_strike_kernel over whole arrays (JIT-compiled when numba is available)"""
+    n = spots.shape[0]
+    ce_strikes = np.empty(n, dtype=np.int64)
+    pe_strikes = np.empty(n, dtype=np.int64)
+    days_to_expiry = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        ce, pe, days = _strike_kernel(spots[i], vixes[i], weekdays[i], minutes_of_day[i], min_dte)
+        ce_strikes[i] = ce
+        pe_strikes[i] = pe
+        days_to_expiry[i] = days
+    return ce_strikes, pe_strikes, days_to_expiry
+
+
+def calculate_strikes(spot: float, vix: float, current_date: date) -> Tuple[int, int, date]:
+    """Strikes and the exact weekly expiry for a day's opening spot/VIX"""
+    # prepare_backtest_data passes plain dates; Timestamps/datetimes carry the intraday time
+    if type(current_date) is date:
+        current_day, minute_of_day = current_date, 0
+    else:
+        current_day = current_date.date()
+        minute_of_day = current_date.hour * 60 + current_date.minute
+    ce_strike, pe_strike, days = _strike_kernel(
+        float(spot), float(vix), current_day.weekday(), minute_of_day, Config.MIN_DTE_TO_HOLD)
+    return int(ce_strike), int(pe_strike), current_day + timedelta(days=int(days))
+
+
+def calculate_strikes_batch(spots: np.ndarray, vixes: np.ndarray, dates: np.ndarray):
+    """Vectorised calculate_strikes for arrays of opening spot/VIX and datetime64[D] dates"""
+    days = dates.astype('datetime64[D]')
+    weekdays = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    minutes_of_day = np.zeros(days.shape[0], dtype=np.int64)  # day-level dates: start of day
+    ce_strikes, pe_strikes, days_to_expiry = _strikes_kernel(
+        np.ascontiguousarray(spots, dtype=np.float64), np.ascontiguousarray(vixes, dtype=np.float64),
+        weekdays, minutes_of_day, Config.MIN_DTE_TO_HOLD
+    )
+    return ce_strikes, pe_strikes, days + days_to_expiry.astype('timedelta64[D]')
+
+
+# Whole-range strike table in one kernel call (see HistoricalDataManager.prepare_backtest_data)
+calculate_strikes.batch = calculate_strikes_batch
+
+
 def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force_refresh: bool = False):
     """Backtest mode - unchanged"""
+    _ensure_dirs()
+    colorama_init(strip=not sys.stdout.isatty())  # plain text when output is redirected
     setup_logging()
 
     print(f"""
@@ -177,24 +314,6 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
 
     data_manager = HistoricalDataManager(broker.kite, Config.BACKTEST_CACHE_DIR)
 
-    def calculate_strikes(spot: float, vix: float, current_date: date) -> Tuple[float, float, date]:
-        if vix > 20:
-            otm_distance = 450
-        elif vix > 15:
-            otm_distance = 400
-        else:
-            otm_distance = 350
-        ce_strike = round(spot / 50) * 50 + otm_distance
-        pe_strike = round(spot / 50) * 50 - otm_distance
-        current = pd.to_datetime(current_date)
-        days_until_tuesday = (1 - current.weekday()) % 7
-        if days_until_tuesday == 0 and current.time() >= pd.Timestamp('15:30').time():
-            days_until_tuesday = 7
-        if days_until_tuesday < Config.MIN_DTE_TO_HOLD:
-             days_until_tuesday += 7
-        expiry = (current + pd.Timedelta(days=days_until_tuesday)).date()
-        return ce_strike, pe_strike, expiry
-
     print(f"{Fore.YELLOW}Downloading and preparing historical data...{Style.RESET_ALL}")
 
     try:
@@ -202,9 +321,15 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
             start_date, end_date, calculate_strikes, force_refresh
         )
 
-        output_filename = f"backtest_data_{start_date}_to_{end_date}.csv"
-        output_file_path = os.path.join(Config.OUTPUT_DIR_DATA, output_filename)
-        backtest_data.to_csv(output_file_path, index=False)
+        # Largest export of the run: typed, compressed parquet when pyarrow is
+        # installed, otherwise gzipped CSV written in big chunks
+        output_stem = os.path.join(Config.OUTPUT_DIR_DATA, f"backtest_data_{start_date}_to_{end_date}")
+        if PYARROW_AVAILABLE:
+            output_file_path = f"{output_stem}.parquet"
+            backtest_data.to_parquet(output_file_path, engine='pyarrow', compression='zstd', index=False)
+        else:
+            output_file_path = f"{output_stem}.csv.gz"
+            backtest_data.to_csv(output_file_path, index=False, chunksize=65536, compression='gzip')
         print(f"{Fore.GREEN}Backtest data saved to: {output_file_path}{Style.RESET_ALL}")
 
     except Exception as e:
@@ -212,9 +337,13 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
         logging.error(f"Backtest data preparation failed: {e}", exc_info=True)
         return
 
+    # Sorted with a positional index: days become searchsorted bounds and the
+    # broker's iloc[current_index] lookups keep working on row positions
+    backtest_data = backtest_data.sort_values('timestamp', kind='stable', ignore_index=True)
+
     Config.PAPER_TRADING = True
     broker.backtest_data = backtest_data
-    db = DatabaseManager(Config.DB_FILE)
+    db = DatabaseManager(Config.DB_FILE, trade_batch_size=Config.BACKTEST_DB_TRADE_BATCH)
     notifier = NotificationManager()
     trade_manager = TradeManager(broker, db, notifier)
     strategy = ShortStrangleStrategy(broker, trade_manager, notifier)
@@ -222,37 +351,56 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
 
     print(f"\n{Fore.CYAN}Starting backtest simulation...{Style.RESET_ALL}\n")
 
-    trading_days = pd.date_range(start_date, end_date, freq='D')
-    total_days = len([d for d in trading_days if not Utils.is_holiday(d.date())])
+    # Weekends and Config.MARKET_HOLIDAYS are excluded by the calendar itself
+    trading_days = pd.bdate_range(start_date, end_date, freq='C', holidays=sorted(Config.MARKET_HOLIDAYS))
+    total_days = len(trading_days)
     current_day = 0
 
+    # Day boundaries by binary search on the sorted timestamps (O(log n) per day)
+    ts_series = backtest_data['timestamp']
+    if ts_series.dt.tz is not None:
+        ts_series = ts_series.dt.tz_localize(None)  # compare on exchange-local time
+    ts_values = ts_series.to_numpy()
+    one_day = np.timedelta64(1, 'D')
+    daily_perf_buffer = []  # written in one transaction after the loop
+
     for current_date in trading_days:
-        if Utils.is_holiday(current_date.date()):
-            continue
         current_day += 1
-        daily_data = backtest_data[backtest_data['timestamp'].dt.date == current_date.date()]
-        if daily_data.empty:
+        day_start = current_date.normalize().to_datetime64()
+        lo = ts_values.searchsorted(day_start, side='left')
+        hi = ts_values.searchsorted(day_start + one_day, side='left')
+        if lo == hi:
             continue
+        daily_data = backtest_data.iloc[lo:hi]
+        broker.load_day(daily_data, lo)  # per-tick reads become array indexing
 
         print(f"\n{Fore.YELLOW}[Day {current_day}/{total_days}] Trading Day: {current_date.strftime('%Y-%m-%d')}{Style.RESET_ALL}")
         strategy.reset_daily_state()
 
         total_ticks = len(daily_data)
-        last_progress = 0
-
-        for idx, index in enumerate(daily_data.index):
-            broker.current_index = index
-            current_time = daily_data.loc[index, 'timestamp']
+        # (tick index, percent) at each 10% step, precomputed: the loop only compares ints
+        checkpoints = iter(sorted({total_ticks * pct // 100: pct for pct in range(10, 100, 10)
+                                   if total_ticks * pct // 100 > 0}.items()))
+        next_cp, next_pct = next(checkpoints, (-1, 0))
+
+        # daily_data is a positional slice (view) of the RangeIndex frame, so row
+        # positions are lo + idx; tolist() keeps Timestamps for run_cycle
+        ts_arr = daily_data['timestamp'].tolist()
+
+        for idx in range(total_ticks):
+            broker.current_index = lo + idx
+            current_time = ts_arr[idx]
             strategy.run_cycle(current_time)
 
-            progress = int((idx / total_ticks) * 100)
-            if progress >= last_progress + 10:
-                print(f"  Progress: {progress}% | Time: {current_time.strftime('%H:%M')}", end='\r')
-                last_progress = progress
+            if idx == next_cp:
+                print(f"  Progress: {next_pct}% | Time: {current_time.strftime('%H:%M')}", end='\r')
+                next_cp, next_pct = next(checkpoints, (-1, 0))
 
         print()
         metrics = trade_manager.get_performance_metrics()
-        db.save_daily_performance(current_date.strftime('%Y-%m-%d'), metrics)
+        daily_perf_buffer.append((current_date.strftime('%Y-%m-%d'), metrics))
+
+    db.save_daily_performance_bulk(daily_perf_buffer)
 
     # Final summary (existing code)
     print(f"\n{Fore.GREEN}Backtest completed successfully!{Style.RESET_ALL}\n")
@@ -260,6 +408,8 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
 
 
 def main():
+    _ensure_dirs()
+    colorama_init(strip=not sys.stdout.isatty())  # plain text when output is redirected
     setup_logging()
 
     print(f"""
@@ -330,7 +480,11 @@ def main():
     # ═══════════════════════════════════════════════════════════════════
 
     print(f"\n{Fore.CYAN}Checking for existing active trades...{Style.RESET_ALL}")
-    restored_count = reconcile_active_trades_from_db(db, trade_manager, broker)
+    # The NFO instruments download is independent of reconciliation: warm it in parallel
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="instruments") as pool:
+        instruments_future = pool.submit(broker.fetch_instruments)
+        restored_count = reconcile_active_trades_from_db(db, trade_manager, broker)
+        instruments_future.result()
 
     if restored_count > 0:
         # Update market data for restored trades
@@ -365,7 +519,8 @@ def main():
         print(f"\n{Fore.YELLOW}Shutting down...{Style.RESET_ALL}")
 
         if trade_manager.active_trades:
-            print(f"Closing {len(trade_manager.active_trades)} open positions...")
+            print(f"Closing {len(trade_manager.active_trades)} open positions "
+                  f"(open P&L: Rs.{trade_manager.total_pnl:+,.2f})...")
             exit_ts = datetime.now()
             trade_manager.close_all_positions("MANUAL_SHUTDOWN", exit_ts)
 
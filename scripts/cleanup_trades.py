@@ -7,9 +7,10 @@ Safe cleanup utility for the trades database.
 Features:
 - Delete all rows in the trades table
 - Delete rows by date range (based on entry_time or exit_time)
+- Delete specific trades by trade_id
 - Dry-run to preview row counts before deletion
 - Automatic backup of DB file before destructive operations
-- Optional VACUUM to reclaim space after deletion
+- Optional incremental vacuum to reclaim space after deletion
 
 Usage examples:
 - Preview all rows that would be deleted:
@@ -27,32 +28,68 @@ Usage examples:
 - Delete rows by exit_time:
     python scripts/cleanup_trades.py --db trades_database.db --after 2025-07-01 --time-field exit_time --confirm
 
+- Delete specific trades:
+    python scripts/cleanup_trades.py --db trades_database.db --trade-ids a1b2c3 d4e5f6 --confirm
+
 Notes:
 - Dates are expected in ISO format: YYYY-MM-DD (time portion, if provided, will be ignored)
 - The script defaults to db path 'trades_database.db' if not provided
+- Confirmed (deleting) runs switch the DB to WAL journal mode (persistent)
 """
 
 import argparse
 import shutil
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from pathlib import Path
 import sys
 
 DEFAULT_DB = "trades_database.db"
+ID_CHUNK = 500  # bound parameters per IN (...) statement
+
+
+FICLONE = 0x40049409  # Linux ioctl: copy-on-write clone of a whole file
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Clone src into dst on CoW filesystems (btrfs/XFS); False if unsupported."""
+    try:
+        import fcntl
+    except ImportError:  # not POSIX
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+    shutil.copystat(src, dst)
+    return True
 
 
 def backup_db(db_path: Path) -> Path:
     timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
     backup_path = db_path.with_name(f"{db_path.stem}_backup_{timestamp}{db_path.suffix}")
-    shutil.copy2(db_path, backup_path)
+    # Near-instant reflink where the filesystem supports it, full copy otherwise
+    if not _reflink(db_path, backup_path):
+        shutil.copy2(db_path, backup_path)
     return backup_path
 
 
+def _day(value: str) -> date:
+    """YYYY-MM-DD (any time portion is ignored)"""
+    return date.fromisoformat(value[:10])
+
+
+def _next_day(value: str) -> str:
+    return (_day(value) + timedelta(days=1)).isoformat()
+
+
 def build_where_clause(args):
     """
     Returns (where_clause_sql, params) or (None, None) if no filter (use --all)
-    Use SQLite DATE() on ISO timestamp stored in entry_time/exit_time text columns.
+    Compares the raw ISO timestamp text in entry_time/exit_time against day
+    bounds (ISO strings sort like dates), so an index on the column is usable.
     """
     tf = args.time_field
     if args.all:
@@ -62,15 +99,15 @@ def build_where_clause(args):
     params = []
 
     if args.before:
-        clauses.append(f"date({tf}) <= date(?)")
-        params.append(args.before)
+        clauses.append(f"{tf} < ?")
+        params.append(_next_day(args.before))
     if args.after:
-        clauses.append(f"date({tf}) >= date(?)")
-        params.append(args.after)
+        clauses.append(f"{tf} >= ?")
+        params.append(_day(args.after).isoformat())
     if args.between:
         start, end = args.between
-        clauses.append(f"date({tf}) BETWEEN date(?) AND date(?)")
-        params.extend([start, end])
+        clauses.append(f"{tf} >= ? AND {tf} < ?")
+        params.extend([_day(start).isoformat(), _next_day(end)])
 
     if not clauses:
         return None, None  # no filters -> treated like --all
@@ -79,6 +116,31 @@ def build_where_clause(args):
     return where, params
 
 
+def ensure_time_index(conn: sqlite3.Connection, time_field: str):
+    """
+    Plain index on the timestamp column for build_where_clause's range predicates
+    (replaces the older date(<time_field>) expression index).
+    """
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"DROP INDEX IF EXISTS idx_trades_{time_field}_date")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_trades_{time_field} ON trades({time_field})")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def missing_schema(conn: sqlite3.Connection, time_field: str):
+    """One PRAGMA up front instead of catching 'no such table/column' mid-query"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(trades)")}
+    if not columns:
+        return "table 'trades' not found"
+    if time_field not in columns:
+        return f"column '{time_field}' not found in trades"
+    return None
+
+
 def count_rows(conn: sqlite3.Connection, where_clause, params):
     cur = conn.cursor()
     if where_clause is None:
@@ -90,18 +152,106 @@ def count_rows(conn: sqlite3.Connection, where_clause, params):
     return cur.fetchone()[0]
 
 
+def rows_exist(conn: sqlite3.Connection, where_clause, params) -> bool:
+    """Stops at the first matching row instead of counting them all"""
+    if where_clause is None:
+        q = "SELECT EXISTS(SELECT 1 FROM trades LIMIT 1)"
+        return bool(conn.execute(q).fetchone()[0])
+    q = f"SELECT EXISTS(SELECT 1 FROM trades WHERE {where_clause} LIMIT 1)"
+    return bool(conn.execute(q, params).fetchone()[0])
+
+
+def tune_connection(conn: sqlite3.Connection):
+    """Connection PRAGMAs for bulk deletes; none of these change the DB file"""
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+
+
+def enable_wal(conn: sqlite3.Connection):
+    """
+    WAL journal mode is persistent in the DB file, so it is only switched on
+    once a confirmed run knows it has rows to delete.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+
+
+def checkpoint_wal(conn: sqlite3.Connection):
+    """Fold the WAL back into the main file and truncate it (before file copy / VACUUM)"""
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
 def delete_rows(conn: sqlite3.Connection, where_clause, params):
-    cur = conn.cursor()
+    """Execute only - the caller owns the transaction (one commit for the whole cleanup)"""
     if where_clause is None:
-        q = "DELETE FROM trades"
-        cur.execute(q)
+        # Unfiltered DELETE hits SQLite's truncate optimisation - no per-row work
+        cur = conn.execute("DELETE FROM trades")
     else:
-        q = f"DELETE FROM trades WHERE {where_clause}"
-        cur.execute(q, params)
-    conn.commit()
+        cur = conn.execute(f"DELETE FROM trades WHERE {where_clause}", params)
     return cur.rowcount
 
 
+def _id_chunks(ids):
+    for i in range(0, len(ids), ID_CHUNK):
+        yield ids[i:i + ID_CHUNK]
+
+
+def count_by_ids(conn: sqlite3.Connection, ids, table: str = "trades", key: str = "trade_id") -> int:
+    total = 0
+    for chunk in _id_chunks(ids):
+        q = f"SELECT COUNT(*) FROM {table} WHERE {key} IN ({','.join('?' * len(chunk))})"
+        total += conn.execute(q, chunk).fetchone()[0]
+    return total
+
+
+def ids_exist(conn: sqlite3.Connection, ids, table: str = "trades", key: str = "trade_id") -> bool:
+    for chunk in _id_chunks(ids):
+        q = f"SELECT EXISTS(SELECT 1 FROM {table} WHERE {key} IN ({','.join('?' * len(chunk))}) LIMIT 1)"
+        if conn.execute(q, chunk).fetchone()[0]:
+            return True
+    return False
+
+
+def delete_by_ids(conn: sqlite3.Connection, ids, table: str = "trades", key: str = "trade_id") -> int:
+    """
+    Delete specific rows by key in IN (...) chunks of ID_CHUNK. Full chunks share
+    one statement via executemany; caller owns the transaction.
+    """
+    full = [chunk for chunk in _id_chunks(ids) if len(chunk) == ID_CHUNK]
+    rest = ids[len(full) * ID_CHUNK:]
+    deleted = 0
+    if full:
+        q = f"DELETE FROM {table} WHERE {key} IN ({','.join('?' * ID_CHUNK)})"
+        deleted += conn.executemany(q, full).rowcount
+    if rest:
+        q = f"DELETE FROM {table} WHERE {key} IN ({','.join('?' * len(rest))})"
+        deleted += conn.execute(q, rest).rowcount
+    return deleted
+
+
+def reclaim_space(conn: sqlite3.Connection, pages: int = 0) -> str:
+    """
+    Return freed pages to the OS. The first run converts the DB to
+    auto_vacuum=INCREMENTAL (this needs one full VACUUM); later runs only
+    release freelist pages (all of them, or at most `pages`).
+    """
+    checkpoint_wal(conn)
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode == 1:
+        return "auto_vacuum=FULL already reclaims on commit"
+    try:
+        if mode == 0:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            return "full VACUUM (converted to auto_vacuum=INCREMENTAL)"
+        sql = f"PRAGMA incremental_vacuum({pages})" if pages > 0 else "PRAGMA incremental_vacuum"
+        conn.execute(sql).fetchall()  # frees one page per step; drain the cursor
+        return "incremental_vacuum"
+    except sqlite3.OperationalError:
+        conn.execute("VACUUM")
+        return "full VACUUM (incremental_vacuum unsupported)"
+
+
 def parse_args():
     p = argparse.ArgumentParser(description="Cleanup trades database (SQLite).")
     p.add_argument("--db", default=DEFAULT_DB, help="Path to SQLite DB file (default: trades_database.db)")
@@ -112,6 +262,8 @@ def parse_args():
     p.add_argument("--after", metavar="YYYY-MM-DD", help="Delete rows where date(time_field) >= this date")
     p.add_argument("--between", nargs=2, metavar=("START_DATE", "END_DATE"),
                    help="Delete rows where date(time_field) BETWEEN START_DATE AND END_DATE (inclusive)")
+    p.add_argument("--trade-ids", nargs="+", metavar="TRADE_ID",
+                   help="Delete only these trade_id values (cannot be combined with --all or date filters)")
     p.add_argument("--dry-run", action="store_true", help="Only print how many rows would be deleted")
     p.add_argument("--confirm", action="store_true",
                    help="Perform deletion (must be provided to actually delete rows)")
@@ -119,7 +271,9 @@ def parse_args():
                    help="Backup DB file before deletion (default: True). Use --no-backup to disable.")
     p.add_argument("--no-backup", dest="backup", action="store_false",
                    help="Disable automatic backup before deletion")
-    p.add_argument("--vacuum", action="store_true", help="Run VACUUM after deletion to reclaim space")
+    p.add_argument("--vacuum", action="store_true", help="Reclaim space after deletion (incremental vacuum)")
+    p.add_argument("--vacuum-pages", type=int, default=0, metavar="N",
+                   help="With --vacuum, release at most N free pages (default: 0 = all)")
     return p.parse_args()
 
 
@@ -131,46 +285,82 @@ def main():
         print(f"ERROR: DB file not found: {db_path}", file=sys.stderr)
         sys.exit(2)
 
-    where_clause, params = build_where_clause(args)
+    ids = list(dict.fromkeys(args.trade_ids)) if args.trade_ids else None
+    if ids and (args.all or args.before or args.after or args.between):
+        print("ERROR: --trade-ids cannot be combined with --all/--before/--after/--between", file=sys.stderr)
+        sys.exit(2)
 
-    # Connect readonly for dry-run count to be safe (we still open writable later)
-    conn = sqlite3.connect(str(db_path))
     try:
-        to_delete = count_rows(conn, where_clause, params)
-    finally:
-        conn.close()
-
-    filter_desc = "ALL rows" if where_clause is None else f"rows matching filters on {args.time_field}"
-    print(f"DB: {db_path}")
-    print(f"Action: Delete {filter_desc}")
-    print(f"Rows that would be deleted: {to_delete}")
-
-    if args.dry_run:
-        print("Dry-run mode: no changes made.")
-        return
-
-    if to_delete == 0:
-        print("No rows to delete. Exiting.")
-        return
-
-    if not args.confirm:
-        print("Not confirmed. Add --confirm to actually perform deletion.")
-        return
-
-    # Backup if requested
-    if args.backup:
-        backup_path = backup_db(db_path)
-        print(f"Backup created: {backup_path}")
+        where_clause, params = build_where_clause(args)
+    except ValueError as e:
+        print(f"ERROR: invalid date: {e}", file=sys.stderr)
+        sys.exit(2)
 
-    # Proceed to delete
-    conn = sqlite3.connect(str(db_path))
+    # One connection for count and delete
+    # Autocommit; the delete transaction is opened explicitly below
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
     try:
-        deleted = delete_rows(conn, where_clause, params)
+        problem = missing_schema(conn, args.time_field)
+        if problem:
+            print(f"ERROR: {problem} in {db_path}", file=sys.stderr)
+            sys.exit(2)
+        writing = args.confirm and not args.dry_run
+        tune_connection(conn)
+
+        if ids:
+            filter_desc = f"{len(ids)} trade_id(s)"
+        elif where_clause is None:
+            filter_desc = "ALL rows"
+        else:
+            filter_desc = f"rows matching filters on {args.time_field}"
+        print(f"DB: {db_path}")
+        print(f"Action: Delete {filter_desc}")
+
+        # COUNT is only needed for previews; a confirmed run takes the DELETE's rowcount
+        if not writing:
+            to_delete = count_by_ids(conn, ids) if ids else count_rows(conn, where_clause, params)
+            print(f"Rows that would be deleted: {to_delete}")
+            if args.dry_run:
+                print("Dry-run mode: no changes made.")
+            elif to_delete == 0:
+                print("No rows to delete. Exiting.")
+            else:
+                print("Not confirmed. Add --confirm to actually perform deletion.")
+            return
+
+        # Cheap probe first: with nothing to delete, leave the file alone
+        # (no WAL switch, no index, no backup)
+        if not (ids_exist(conn, ids) if ids else rows_exist(conn, where_clause, params)):
+            print("No rows to delete. Exiting.")
+            return
+
+        # Previews stay read-only; WAL and the index are only set up when deleting
+        enable_wal(conn)
+        if where_clause is not None:
+            ensure_time_index(conn, args.time_field)
+
+        # Backup if requested; checkpoint first so the .db file alone is complete
+        if args.backup:
+            checkpoint_wal(conn)
+            backup_path = backup_db(db_path)
+            print(f"Backup created: {backup_path}")
+
+        # Proceed to delete: one transaction holding the write lock from the start
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if ids:
+                deleted = delete_by_ids(conn, ids)
+            else:
+                deleted = delete_rows(conn, where_clause, params)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
         print(f"Deleted rows: {deleted}")
-        if args.vacuum:
-            print("Running VACUUM...")
-            conn.execute("VACUUM")
-            print("VACUUM complete.")
+        if args.vacuum and deleted:
+            print("Reclaiming space...")
+            method = reclaim_space(conn, args.vacuum_pages)
+            print(f"Space reclaimed: {method}.")
     finally:
         conn.close()
 
@@ -3,25 +3,59 @@ short_strangle_system_V4_PRODUCTION.py - FIXED VERSION
 Enhanced Short Strangle NIFTY Options Trading System with Production-Quality Backtesting
 """
 
+import csv
+import os
 import sys
 import time
+import atexit
+import itertools
+import queue
+import threading
 import logging
-from datetime import datetime, date, time as dt_time
-from typing import Optional, Dict, List, Any, Tuple
+import re
+from datetime import datetime, date, timedelta, time as dt_time
+from functools import lru_cache
+from typing import Optional, Dict, List, Any, Sequence, Tuple
 from enum import Enum
+from dataclasses import dataclass, field
 import pandas as pd
 import numpy as np
 from colorama import Fore, Style
-from tabulate import tabulate
 import sqlite3
 import requests
 import webbrowser
-from kiteconnect import KiteConnect
 from pathlib import Path
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from tqdm import tqdm
+    TQDM_AVAILABLE = True
+except ImportError:
+    TQDM_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when numba isn't installed"""
+        def decorator(func):
+            return func
+        return decorator
+
 # Import historical data manager
 from historical_data_manager import HistoricalDataManager
 
+_STRIKE_RE = re.compile(r'(\d{5,})(CE|PE)$')
+
 
 class Direction(Enum):
     BUY = "BUY"
@@ -41,6 +75,13 @@ class Config:
     ENTRY_START = "09:30:00"
     ENTRY_STOP = "14:30:00"
     SQUARE_OFF = "15:15:00"
+    # Parsed once; Utils.is_* compare against these every tick
+    _MARKET_START = dt_time.fromisoformat(MARKET_START)
+    _MARKET_END = dt_time.fromisoformat(MARKET_END)
+    _ENTRY_START = dt_time.fromisoformat(ENTRY_START)
+    _ENTRY_STOP = dt_time.fromisoformat(ENTRY_STOP)
+    _SQUARE_OFF = dt_time.fromisoformat(SQUARE_OFF)
+    _WEEKEND = frozenset({5, 6})
     STOP_LOSS_PCT = 0.25
     TRAILING_STOP_PCT = 0.15
     MIN_COMBINED_PREMIUM = 50
@@ -57,7 +98,9 @@ class Config:
     VIX_HIGH_THRESHOLD = 18.0  # Lowered from 25.0
     VIX_LOW_THRESHOLD = 10.0  # Lowered from 15.0
     # NOTE: As per SEBI guidelines, NIFTY weekly expiry is now TUESDAY (not Thursday)
+    MARKET_HOLIDAYS = frozenset()  # Exchange holidays falling on weekdays, "YYYY-MM-DD"
     DB_FILE = "trades_database.db"
+    BACKTEST_DB_TRADE_BATCH = 1000  # trade rows buffered per SQLite commit in backtests
     LOG_FILE = "strangle_trading.log"
     AUDIT_FILE = "audit_trail.txt"
     TELEGRAM_BOT_TOKEN = "your_telegram_bot_token"
@@ -66,30 +109,40 @@ class Config:
     BACKTEST_CACHE_DIR = "backtest_cache"
 
 
+@dataclass(slots=True)
 class MarketData:
-    def __init__(self, **kwargs):
-        self.nifty_spot = kwargs.get('nifty_spot', 0.0)
-        self.nifty_future = kwargs.get('nifty_future', 0.0)
-        self.nifty_open = kwargs.get('nifty_open', 0.0)
-        self.nifty_high = kwargs.get('nifty_high', 0.0)
-        self.nifty_low = kwargs.get('nifty_low', 0.0)
-        self.india_vix = kwargs.get('india_vix', 0.0)
-        self.vix_30day_avg = kwargs.get('vix_30day_avg', 0.0)
-        self.banknifty_spot = kwargs.get('banknifty_spot', 0.0)
-        self.banknifty_open = kwargs.get('banknifty_open', 0.0)
-        self.banknifty_high = kwargs.get('banknifty_high', 0.0)
-        self.banknifty_low = kwargs.get('banknifty_low', 0.0)
-        self.sensex_spot = kwargs.get('sensex_spot', 0.0)
-        self.advance_decline_ratio = kwargs.get('advance_decline_ratio', 0.0)
-        self.timestamp = kwargs.get('timestamp', datetime.now())
-        self.iv_percentile = kwargs.get('iv_percentile', 50.0)
-        self.atm_iv = kwargs.get('atm_iv', 0.0)
-        self.iv_rank = kwargs.get('iv_rank', 50.0)
+    # Typed fields with defaults: construction is a fixed-offset __init__, not kwargs.get probing
+    nifty_spot: float = 0.0
+    nifty_future: float = 0.0
+    nifty_open: float = 0.0
+    nifty_high: float = 0.0
+    nifty_low: float = 0.0
+    india_vix: float = 0.0
+    vix_30day_avg: float = 0.0
+    banknifty_spot: float = 0.0
+    banknifty_open: float = 0.0
+    banknifty_high: float = 0.0
+    banknifty_low: float = 0.0
+    sensex_spot: float = 0.0
+    advance_decline_ratio: float = 0.0
+    timestamp: datetime = field(default_factory=datetime.now)
+    iv_percentile: float = 50.0
+    atm_iv: float = 0.0
+    iv_rank: float = 50.0
 
 
 class Trade:
+    __slots__ = ('trade_id', 'symbol', 'qty', 'direction', 'entry_price', 'current_price',
+                 'timestamp', 'option_type', 'slippage', 'greeks', 'highest_profit',
+                 'trailing_stop_price', 'strike_price', 'rolled_from')
+
+    # Option type is a small int so hot-path leg checks compare ints, not strings
+    CE = 0
+    PE = 1
+    OPTION_TYPE_NAMES = ("CE", "PE")
+
     def __init__(self, trade_id: str, symbol: str, qty: int, direction: Direction, price: float,
-                 timestamp: datetime, option_type: str):
+                 timestamp: datetime, option_type: int, strike_price: Optional[float] = None):
         self.trade_id = trade_id
         self.symbol = symbol
         self.qty = qty
@@ -102,19 +155,19 @@ class Trade:
         self.greeks = None
         self.highest_profit = 0.0
         self.trailing_stop_price = None
-        self.strike_price = self._extract_strike_from_symbol(symbol)
+        self.strike_price = (strike_price if strike_price is not None
+                             else self._extract_strike_from_symbol(symbol))
         self.rolled_from = None
 
     def _extract_strike_from_symbol(self, symbol: str) -> float:
         """Extract strike price from option symbol"""
-        try:
-            import re
-            match = re.search(r'(\d{5,})(CE|PE)$', symbol)
-            if match:
-                return float(match.group(1))
-        except:
-            pass
-        return 0.0
+        match = _STRIKE_RE.search(symbol)
+        return float(match.group(1)) if match else 0.0
+
+    @property
+    def option_type_str(self) -> str:
+        """Option type as "CE" or "PE", for symbols, logs and the trades table"""
+        return Trade.OPTION_TYPE_NAMES[self.option_type]
 
     def update_price(self, price: float):
         self.current_price = price
@@ -134,12 +187,24 @@ class Trade:
 
 
 class DatabaseManager:
-    def __init__(self, db_file: str):
+    TRADE_INSERT = '''
+            INSERT OR REPLACE INTO trades 
+            (trade_id, symbol, qty, direction, entry_price, exit_price, entry_time, exit_time, 
+             option_type, pnl, strike_price, rolled_from)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+
+    def __init__(self, db_file: str, trade_batch_size: int = 1):
         self.conn = sqlite3.connect(db_file)
+        # Rows buffered by save_trade; 1 = write-through (live trading)
+        self.trade_batch_size = max(1, trade_batch_size)
+        self._trade_buffer: List[tuple] = []
         self.create_tables()
 
     def create_tables(self):
         cursor = self.conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
         cursor.execute('''
                        CREATE TABLE IF NOT EXISTS trades
                        (
@@ -201,66 +266,190 @@ class DatabaseManager:
         self.conn.commit()
 
     def save_trade(self, trade: Trade, exit_price: float = None, exit_time: datetime = None):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO trades 
-            (trade_id, symbol, qty, direction, entry_price, exit_price, entry_time, exit_time, 
-             option_type, pnl, strike_price, rolled_from)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        self._trade_buffer.append((
             trade.trade_id, trade.symbol, trade.qty, trade.direction.value,
             trade.entry_price, exit_price,
             trade.timestamp.isoformat(),
             exit_time.isoformat() if exit_time else None,
-            trade.option_type,
+            trade.option_type_str,
             trade.get_pnl() if exit_price else None,
             trade.strike_price,
             trade.rolled_from
         ))
-        self.conn.commit()
+        if len(self._trade_buffer) >= self.trade_batch_size:
+            self.flush_trades()
 
-    def save_daily_performance(self, date_str: str, metrics: Any):
-        cursor = self.conn.cursor()
-        cursor.execute('''
+    def flush_trades(self):
+        """Write buffered trade rows with one executemany in one transaction"""
+        if not self._trade_buffer:
+            return
+        with self.conn:
+            self.conn.executemany(self.TRADE_INSERT, self._trade_buffer)
+        self._trade_buffer.clear()
+
+    DAILY_PERFORMANCE_INSERT = '''
             INSERT OR REPLACE INTO daily_performance 
             (date, total_trades, win_trades, total_pnl, ce_pnl, pe_pnl, max_drawdown, 
              profit_factor, sharpe_ratio, rolled_positions)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        '''
+
+    @staticmethod
+    def _daily_performance_row(date_str: str, metrics: Any) -> tuple:
+        return (
             date_str, metrics.total_trades, metrics.win_trades, metrics.total_pnl,
             metrics.ce_pnl, metrics.pe_pnl, metrics.max_drawdown,
             metrics.profit_factor, metrics.sharpe_ratio, metrics.rolled_positions
-        ))
+        )
+
+    def save_daily_performance(self, date_str: str, metrics: Any):
+        cursor = self.conn.cursor()
+        cursor.execute(self.DAILY_PERFORMANCE_INSERT, self._daily_performance_row(date_str, metrics))
         self.conn.commit()
 
-    def get_performance_history(self, days: int = 30) -> pd.DataFrame:
-        query = f"SELECT * FROM daily_performance ORDER BY date DESC LIMIT {days}"
-        return pd.read_sql_query(query, self.conn)
+    def save_daily_performance_batch(self, entries: List[Tuple[str, Any]]):
+        """Write many (date_str, metrics) rows in one transaction"""
+        if not entries:
+            return
+        with self.conn:
+            self.conn.executemany(
+                self.DAILY_PERFORMANCE_INSERT,
+                [self._daily_performance_row(date_str, metrics) for date_str, metrics in entries]
+            )
+
+    PERFORMANCE_DTYPE = np.dtype([
+        ('date', 'U10'), ('total_trades', 'i4'), ('win_trades', 'i4'), ('total_pnl', 'f8'),
+        ('ce_pnl', 'f8'), ('pe_pnl', 'f8'), ('max_drawdown', 'f8'), ('profit_factor', 'f8'),
+        ('sharpe_ratio', 'f8'), ('rolled_positions', 'i4'),
+    ])
+
+    def get_performance_history(self, days: int = 30) -> np.ndarray:
+        """Latest `days` rows, newest first, as a structured array (NULL reals read as NaN)"""
+        rows = self.conn.execute(
+            "SELECT date, IFNULL(total_trades, 0), IFNULL(win_trades, 0), total_pnl, ce_pnl, pe_pnl, "
+            "max_drawdown, profit_factor, sharpe_ratio, IFNULL(rolled_positions, 0) "
+            "FROM daily_performance ORDER BY date DESC LIMIT ?", (days,)
+        ).fetchall()
+        return np.array(rows, dtype=self.PERFORMANCE_DTYPE)
 
     def get_all_trades(self) -> pd.DataFrame:
+        self.flush_trades()
         query = "SELECT * FROM trades ORDER BY entry_time"
         return pd.read_sql_query(query, self.conn)
 
+    def export_query_to_csv(self, query: str, path: str, params: tuple = (),
+                            batch_size: int = 10000) -> int:
+        """
+        Stream a query's rows straight to CSV (no DataFrame). Returns rows written.
+        Written to <path>.tmp and renamed, so readers never see a truncated file.
+        No file is created when the query returns no rows.
+        """
+        self.flush_trades()
+        cursor = self.conn.execute(query, params)
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return 0
+        rows_written = 0
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+                writer = csv.writer(f)
+                writer.writerow([col[0] for col in cursor.description])
+                while rows:
+                    writer.writerows(rows)
+                    rows_written += len(rows)
+                    rows = cursor.fetchmany(batch_size)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return rows_written
+
+    def export_trades_to_csv(self, path: str) -> int:
+        return self.export_query_to_csv("SELECT * FROM trades ORDER BY entry_time", path)
+
+    def export_daily_performance_to_csv(self, path: str, days: int = 1000) -> int:
+        """Latest `days` rows, newest first (same rows as get_performance_history)"""
+        return self.export_query_to_csv(
+            "SELECT * FROM daily_performance ORDER BY date DESC LIMIT ?", path, (days,)
+        )
+
     def close(self):
+        self.flush_trades()
         self.conn.close()
 
 
 class NotificationManager:
+    COALESCE_WINDOW = 1.0  # seconds; alerts arriving together go out as one message
+    MAX_MESSAGE_LEN = 4096  # Telegram sendMessage text limit
+
     def __init__(self):
         self.bot_token = Config.TELEGRAM_BOT_TOKEN
         self.chat_id = Config.TELEGRAM_CHAT_ID
+        self._queue: Optional[queue.Queue] = None
+        self._worker_thread = None
+        if self.bot_token == "your_telegram_bot_token":
+            return  # Not configured: send_alert stays a no-op, no thread
+        # Delivery runs on a daemon thread so Telegram's round-trip never blocks a tick
+        self._session = requests.Session()
+        self._url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        self._queue = queue.Queue()
+        self._worker_thread = threading.Thread(target=self._worker, name="telegram-alerts", daemon=True)
+        self._worker_thread.start()
+        atexit.register(self.close)
 
     def send_alert(self, message: str, level: str):
-        if self.bot_token == "your_telegram_bot_token":
+        if self._queue is None:
             return  # Skip if not configured
+        self._queue.put_nowait(f"{level}: {message}")
+
+    def close(self, timeout: float = 5.0):
+        """Deliver queued alerts and stop the worker"""
+        if self._worker_thread is None:
+            return
+        self._queue.put(None)
+        self._worker_thread.join(timeout)
+        self._worker_thread = None
+
+    def _worker(self):
+        while True:
+            text = self._queue.get()
+            if text is None:
+                return
+            batch, size = [text], len(text)
+            stop = False
+            deadline = time.monotonic() + self.COALESCE_WINDOW
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    text = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if text is None:
+                    stop = True
+                    break
+                if size + len(text) + 2 > self.MAX_MESSAGE_LEN:
+                    self._post("\n\n".join(batch))
+                    batch, size = [], 0
+                batch.append(text)
+                size += len(text) + 2
+            self._post("\n\n".join(batch))
+            if stop:
+                return
+
+    def _post(self, text: str):
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
             payload = {
                 'chat_id': self.chat_id,
-                'text': f"{level}: {message}",
+                'text': text,
                 'parse_mode': 'HTML'
             }
-            response = requests.post(url, json=payload)
+            response = self._session.post(self._url, json=payload, timeout=10)
             response.raise_for_status()
         except Exception as e:
             logging.error(f"Failed to send Telegram alert: {e}")
@@ -286,48 +475,79 @@ class Utils:
     @staticmethod
     def is_market_hours(backtest_timestamp: Optional[datetime] = None) -> bool:
         now = Utils.get_now(backtest_timestamp).time()
-        start = dt_time.fromisoformat(Config.MARKET_START)
-        end = dt_time.fromisoformat(Config.MARKET_END)
-        return start <= now <= end
+        return Config._MARKET_START <= now <= Config._MARKET_END
 
     @staticmethod
     def is_entry_window(backtest_timestamp: Optional[datetime] = None) -> bool:
         now = Utils.get_now(backtest_timestamp).time()
-        start = dt_time.fromisoformat(Config.ENTRY_START)
-        stop = dt_time.fromisoformat(Config.ENTRY_STOP)
-        return start <= now <= stop
+        return Config._ENTRY_START <= now <= Config._ENTRY_STOP
 
     @staticmethod
     def is_square_off_time(backtest_timestamp: Optional[datetime] = None) -> bool:
-        now = Utils.get_now(backtest_timestamp).time()
-        square_off = dt_time.fromisoformat(Config.SQUARE_OFF)
-        return now >= square_off
+        return Utils.get_now(backtest_timestamp).time() >= Config._SQUARE_OFF
 
     @staticmethod
     def is_holiday(backtest_date: Optional[date] = None) -> bool:
-        if backtest_date:
-            return backtest_date.weekday() in [5, 6]
-        today = datetime.now().date()
-        return today.weekday() in [5, 6]
+        check_date = backtest_date if backtest_date else datetime.now().date()
+        return check_date.weekday() in Config._WEEKEND or check_date.isoformat() in Config.MARKET_HOLIDAYS
+
+    # Seeded from the wall clock (µs) so ids stay unique across runs sharing one trades DB
+    _id_counter = itertools.count(time.time_ns() // 1000)
 
     @staticmethod
     def generate_id() -> str:
-        return str(np.random.randint(100000, 999999))
+        return str(next(Utils._id_counter))
 
     @staticmethod
     def prepare_option_symbol(strike: float, option_type: str, expiry: date) -> str:
-        expiry_str = expiry.strftime("%y%b").upper()
-        strike_str = str(int(strike))
-        return f"NIFTY{expiry_str}{strike_str}{option_type}"
+        return Utils._option_symbol(int(strike), option_type, expiry)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _option_symbol(strike: int, option_type: str, expiry: date) -> str:
+        # Memoised: a week's strike ladder repeats the same few symbols every tick
+        return f"NIFTY{expiry.strftime('%y%b').upper()}{strike}{option_type}"
 
 
 class BrokerInterface:
+    # Numeric backtest columns pulled out as float64 arrays (missing ones read as 0.0)
+    BACKTEST_COLUMNS = ('nifty_spot', 'nifty_future', 'nifty_open', 'nifty_high', 'nifty_low',
+                        'india_vix', 'vix_30day_avg', 'ce_price', 'pe_price')
+
     def __init__(self, backtest_data: pd.DataFrame = None):
-        self.kite = KiteConnect(api_key=Config.API_KEY)
+        self._kite = None
         self.backtest_data = backtest_data
         self.current_index = 0
         self.access_token_expiry = None
 
+    @property
+    def kite(self):
+        """KiteConnect client, created (and kiteconnect imported) on first live use"""
+        if self._kite is None:
+            from kiteconnect import KiteConnect
+            self._kite = KiteConnect(api_key=Config.API_KEY)
+        return self._kite
+
+    @property
+    def backtest_data(self) -> Optional[pd.DataFrame]:
+        return self._backtest_data
+
+    @backtest_data.setter
+    def backtest_data(self, data: Optional[pd.DataFrame]):
+        # Per-tick reads become integer indexing into typed arrays instead of
+        # materialising an iloc row Series and probing it with .get()
+        self._backtest_data = data
+        self._col: Dict[str, np.ndarray] = {}
+        self._ts = None
+        if data is None:
+            return
+        for name in self.BACKTEST_COLUMNS:
+            self._col[name] = (data[name].to_numpy(dtype=np.float64, copy=False) if name in data.columns
+                               else np.zeros(len(data), dtype=np.float64))
+        if 'timestamp' in data.columns:
+            # DatetimeArray: indexing yields a Timestamp and keeps any timezone
+            self._ts = pd.to_datetime(data['timestamp']).array
+
     def authenticate(self):
         if self.backtest_data is not None:
             logging.info("Backtesting mode: Using historical data")
@@ -362,13 +582,13 @@ class BrokerInterface:
             return False
 
     def get_quote(self, symbol: str) -> float:
-        if self.backtest_data is not None:
-            current_row = self.backtest_data.iloc[self.current_index]
-            if symbol.startswith("NIFTY") and symbol.endswith("CE"):
-                return current_row.get('ce_price', 0.0)
-            elif symbol.startswith("NIFTY") and symbol.endswith("PE"):
-                return current_row.get('pe_price', 0.0)
-            return current_row.get('nifty_spot', 0.0)
+        if self._backtest_data is not None:
+            if symbol.startswith("NIFTY"):
+                if symbol.endswith("CE"):
+                    return self._col['ce_price'][self.current_index]
+                if symbol.endswith("PE"):
+                    return self._col['pe_price'][self.current_index]
+            return self._col['nifty_spot'][self.current_index]
         try:
             quote = self.kite.quote(symbol)
             return quote[symbol]['last_price']
@@ -376,21 +596,36 @@ class BrokerInterface:
             logging.error(f"Failed to fetch quote for {symbol}")
             return 0.0
 
+    def get_quotes(self, symbols: Sequence[str]) -> Dict[str, float]:
+        """Prices for many symbols: array reads in backtests, one kite.quote round-trip live"""
+        if self._backtest_data is not None:
+            return {symbol: self.get_quote(symbol) for symbol in symbols}
+        if not symbols:
+            return {}
+        try:
+            quotes = self.kite.quote(list(symbols))
+        except Exception:
+            logging.error(f"Failed to fetch quotes for {', '.join(symbols)}")
+            quotes = {}
+        return {symbol: quotes[symbol]['last_price'] if symbol in quotes else 0.0
+                for symbol in symbols}
+
     def get_lot_size(self, symbol: str) -> int:
         return 50
 
     def get_market_data(self) -> MarketData:
-        if self.backtest_data is not None:
-            row = self.backtest_data.iloc[self.current_index]
+        if self._backtest_data is not None:
+            i = self.current_index
+            col = self._col
             return MarketData(
-                nifty_spot=row.get('nifty_spot', 0.0),
-                nifty_future=row.get('nifty_future', 0.0),
-                nifty_open=row.get('nifty_open', 0.0),
-                nifty_high=row.get('nifty_high', 0.0),
-                nifty_low=row.get('nifty_low', 0.0),
-                india_vix=row.get('india_vix', 0.0),
-                vix_30day_avg=row.get('vix_30day_avg', 0.0),
-                timestamp=pd.to_datetime(row['timestamp'])
+                nifty_spot=col['nifty_spot'][i],
+                nifty_future=col['nifty_future'][i],
+                nifty_open=col['nifty_open'][i],
+                nifty_high=col['nifty_high'][i],
+                nifty_low=col['nifty_low'][i],
+                india_vix=col['india_vix'][i],
+                vix_30day_avg=col['vix_30day_avg'][i],
+                timestamp=self._ts[i]
             )
         return MarketData()
 
@@ -415,7 +650,54 @@ class BrokerInterface:
             return ""
 
 
+# Per-trade decisions returned by _manage_positions
+EXIT_NONE = 0
+EXIT_PROFIT_TARGET = 1
+EXIT_TRAILING_STOP = 2
+EXIT_ROLL = 3
+
+
+@njit("int8[::1](float64[::1], float64[::1], int32[::1], int8[::1], boolean[::1], float64[::1], "
+      "float64[::1], boolean[::1], float64, float64, float64)", cache=True)
+def _manage_positions(entry, cur, qty, direction, live, highest, trailing, rolled,
+                      profit_target_pct, trailing_stop_pct, roll_threshold_pct):
+    """
+    Profit-target / trailing-stop / roll checks for every live slot (P&L % as in
+    Trade.get_pnl_pct). The only implementation of these exit rules; updates highest
+    and trailing (NaN = no trailing stop yet) in place. No fastmath: NaN is a sentinel.
+    """
+    actions = np.zeros(entry.shape[0], dtype=np.int8)
+    for i in range(entry.shape[0]):
+        if not live[i]:
+            continue
+        pnl = (entry[i] - cur[i]) * qty[i] * direction[i]
+        if pnl > highest[i]:
+            highest[i] = pnl
+        pnl_pct = 0.0 if entry[i] == 0 else pnl / (entry[i] * qty[i]) * 100
+        if pnl_pct >= profit_target_pct * 100:
+            actions[i] = EXIT_PROFIT_TARGET
+            continue
+        if pnl_pct > 0:
+            required = highest[i] * (1 - trailing_stop_pct)
+            if np.isnan(trailing[i]) or required > trailing[i]:
+                trailing[i] = required
+        if not np.isnan(trailing[i]) and pnl < trailing[i]:
+            actions[i] = EXIT_TRAILING_STOP
+            continue
+        if pnl_pct <= -roll_threshold_pct * 100 and not rolled[i]:
+            actions[i] = EXIT_ROLL
+    return actions
+
+
+class Metrics:
+    """Performance snapshot returned by TradeManager.get_performance_metrics"""
+    __slots__ = ('total_trades', 'win_trades', 'win_rate', 'total_pnl', 'ce_pnl', 'pe_pnl',
+                 'rolled_positions', 'max_drawdown', 'profit_factor', 'sharpe_ratio')
+
+
 class TradeManager:
+    INITIAL_SLOTS = 16
+
     def __init__(self, broker: BrokerInterface, db: DatabaseManager, notifier: NotificationManager):
         self.broker = broker
         self.db = db
@@ -429,13 +711,51 @@ class TradeManager:
         self.ce_trades = 0
         self.pe_trades = 0
         self.rolled_positions = 0
-        self.daily_pnl_history = []
+        # Closed-day P&L in a growable float64 buffer (see daily_pnl_history)
+        self._pnl_buf = np.empty(64, dtype=np.float64)
+        self._pnl_len = 0
+        # Struct-of-arrays mirror of active_trades for vectorised leg math;
+        # one slot per open trade, recycled on close
+        n = self.INITIAL_SLOTS
+        self._slot: Dict[str, int] = {}
+        self._free_slots: List[int] = list(range(n - 1, -1, -1))
+        self._entry = np.zeros(n, dtype=np.float64)
+        self._cur = np.zeros(n, dtype=np.float64)
+        self._qty = np.zeros(n, dtype=np.int32)
+        self._dir = np.zeros(n, dtype=np.int8)  # +1 SELL, -1 BUY
+        self._opt = np.zeros(n, dtype=np.int8)  # Trade.CE / Trade.PE
+        self._live = np.zeros(n, dtype=bool)
+        self._high = np.zeros(n, dtype=np.float64)  # Trade.highest_profit
+        self._trail = np.full(n, np.nan)  # Trade.trailing_stop_price, NaN = None
+        self._rolled = np.zeros(n, dtype=bool)  # Trade.rolled_from is set
+
+    def _grow_slots(self):
+        old = self._live.shape[0]
+        for name in ('_entry', '_cur', '_qty', '_dir', '_opt', '_live', '_high', '_trail', '_rolled'):
+            col = getattr(self, name)
+            grown = np.zeros(2 * old, dtype=col.dtype)
+            grown[:old] = col
+            setattr(self, name, grown)
+        self._free_slots.extend(range(2 * old - 1, old - 1, -1))
 
     def add_trade(self, trade: Trade):
         self.active_trades[trade.trade_id] = trade
+        if not self._free_slots:
+            self._grow_slots()
+        slot = self._free_slots.pop()
+        self._slot[trade.trade_id] = slot
+        self._entry[slot] = trade.entry_price
+        self._cur[slot] = trade.current_price
+        self._qty[slot] = trade.qty
+        self._dir[slot] = 1 if trade.direction == Direction.SELL else -1
+        self._opt[slot] = trade.option_type
+        self._live[slot] = True
+        self._high[slot] = trade.highest_profit
+        self._trail[slot] = np.nan if trade.trailing_stop_price is None else trade.trailing_stop_price
+        self._rolled[slot] = trade.rolled_from is not None
         self.db.save_trade(trade)
         self.total_trades += 1
-        if trade.option_type == "CE":
+        if trade.option_type == Trade.CE:
             self.ce_trades += 1
         else:
             self.pe_trades += 1
@@ -447,19 +767,39 @@ class TradeManager:
             "INFO"
         )
 
-    def close_trade(self, trade_id: str, exit_price: float):
+    def update_price(self, trade_id: str, price: float):
+        """Mark an active trade to market (keeps the SoA columns in sync)"""
+        self.active_trades[trade_id].update_price(price)
+        self._cur[self._slot[trade_id]] = price
+
+    def evaluate_positions(self) -> Dict[str, int]:
+        """Run the exit checks over all open trades at once; trade_id -> EXIT_* in entry order"""
+        actions = _manage_positions(self._entry, self._cur, self._qty, self._dir, self._live,
+                                    self._high, self._trail, self._rolled, Config.PROFIT_TARGET_PCT,
+                                    Config.TRAILING_STOP_PCT, Config.ROLL_THRESHOLD_PCT)
+        result = {}
+        for trade_id, slot in self._slot.items():
+            trail = self._trail[slot]
+            self.active_trades[trade_id].trailing_stop_price = None if np.isnan(trail) else float(trail)
+            result[trade_id] = int(actions[slot])
+        return result
+
+    def close_trade(self, trade_id: str, exit_price: float, ts: Optional[datetime] = None):
         if trade_id in self.active_trades:
             trade = self.active_trades[trade_id]
             trade.update_price(exit_price)
+            slot = self._slot.pop(trade_id)
+            self._live[slot] = False
+            self._free_slots.append(slot)
             pnl = trade.get_pnl()
             self.daily_pnl += pnl
-            if trade.option_type == "CE":
+            if trade.option_type == Trade.CE:
                 self.ce_pnl += pnl
             else:
                 self.pe_pnl += pnl
             if pnl > 0:
                 self.win_trades += 1
-            self.db.save_trade(trade, exit_price, datetime.now())
+            self.db.save_trade(trade, exit_price, Utils.get_now(ts))
             logging.info(f"TRADE CLOSED: {trade.symbol}, P&L: Rs.{pnl:,.2f}")
             self.notifier.send_alert(
                 f"Closed Trade: {trade.symbol}, P&L: Rs.{pnl:,.2f}",
@@ -467,34 +807,48 @@ class TradeManager:
             )
             del self.active_trades[trade_id]
 
-    def get_leg_trades(self, option_type: str) -> List[Trade]:
-        return [t for t in self.active_trades.values() if t.option_type == option_type]
+    def _leg_mask(self, option_type: int) -> np.ndarray:
+        return self._live & (self._opt == option_type)
 
-    def get_leg_pnl(self, option_type: str) -> float:
-        return sum(t.get_pnl() for t in self.get_leg_trades(option_type))
+    def get_leg_pnl(self, option_type: int) -> float:
+        mask = self._leg_mask(option_type)
+        return float(((self._entry - self._cur) * self._qty * self._dir)[mask].sum())
 
-    def check_leg_stop_loss(self, option_type: str) -> bool:
-        leg_trades = self.get_leg_trades(option_type)
-        if not leg_trades:
+    def check_leg_stop_loss(self, option_type: int) -> bool:
+        mask = self._leg_mask(option_type)
+        if not mask.any():
             return False
-        total_entry_premium = sum(t.entry_price * t.qty for t in leg_trades)
+        # Gather the leg once; premium and P&L both come from the same slices
+        entry = self._entry[mask]
+        qty = self._qty[mask]
+        total_entry_premium = entry @ qty
         if total_entry_premium == 0:
             return False
-        leg_pnl = self.get_leg_pnl(option_type)
+        leg_pnl = ((entry - self._cur[mask]) * self._dir[mask]) @ qty
         loss_pct = abs(leg_pnl / total_entry_premium)
         return loss_pct >= Config.MAX_LOSS_ONE_LEG_PCT
 
+    def end_of_bar(self):
+        """Commit trade rows buffered since the last bar in one transaction"""
+        self.db.flush_trades()
+
     def reset_daily_metrics(self):
         """Reset metrics for new trading day"""
-        self.daily_pnl_history.append(self.daily_pnl)
+        if self._pnl_len == self._pnl_buf.shape[0]:
+            # Geometric growth keeps appends amortised O(1)
+            self._pnl_buf = np.resize(self._pnl_buf, 2 * self._pnl_len)
+        self._pnl_buf[self._pnl_len] = self.daily_pnl
+        self._pnl_len += 1
         self.daily_pnl = 0.0
         self.ce_pnl = 0.0
         self.pe_pnl = 0.0
 
-    def get_performance_metrics(self) -> Any:
-        class Metrics:
-            pass
+    @property
+    def daily_pnl_history(self) -> np.ndarray:
+        """P&L of each closed trading day (view into the internal buffer)"""
+        return self._pnl_buf[:self._pnl_len]
 
+    def get_performance_metrics(self) -> Metrics:
         metrics = Metrics()
         metrics.total_trades = self.total_trades
         metrics.win_trades = self.win_trades
@@ -504,59 +858,72 @@ class TradeManager:
         metrics.pe_pnl = self.pe_pnl
         metrics.rolled_positions = self.rolled_positions
 
-        # Calculate drawdown
-        if self.daily_pnl_history:
-            cumulative = np.cumsum(self.daily_pnl_history)
-            running_max = np.maximum.accumulate(cumulative)
-            drawdown = cumulative - running_max
-            metrics.max_drawdown = abs(np.min(drawdown)) if len(drawdown) > 0 else 0.0
-        else:
-            metrics.max_drawdown = 0.0
-
-        # Calculate profit factor
-        if self.daily_pnl_history:
-            profits = [p for p in self.daily_pnl_history if p > 0]
-            losses = [abs(p) for p in self.daily_pnl_history if p < 0]
-            total_profit = sum(profits) if profits else 0
-            total_loss = sum(losses) if losses else 1
+        # Every statistic is a NumPy reduction over one view of the history buffer
+        returns = self.daily_pnl_history
+        if returns.size:
+            cumulative = np.cumsum(returns)
+            metrics.max_drawdown = abs((cumulative - np.maximum.accumulate(cumulative)).min())
+            total_profit = returns[returns > 0].sum()
+            losses = returns[returns < 0]
+            total_loss = -losses.sum() if losses.size else 1
             metrics.profit_factor = total_profit / total_loss if total_loss > 0 else 0.0
         else:
+            metrics.max_drawdown = 0.0
             metrics.profit_factor = 0.0
 
-        # Calculate Sharpe ratio
-        if len(self.daily_pnl_history) > 1:
-            returns = np.array(self.daily_pnl_history)
-            metrics.sharpe_ratio = np.mean(returns) / np.std(returns) * np.sqrt(252) if np.std(returns) > 0 else 0.0
+        if returns.size > 1:
+            std = returns.std()
+            metrics.sharpe_ratio = returns.mean() / std * np.sqrt(252) if std > 0 else 0.0
         else:
             metrics.sharpe_ratio = 0.0
 
         return metrics
 
 
+VIX_WINDOW = 252  # IV percentile lookback (ticks)
+
+
+# Explicit signature: compiled once at import (and cached on disk), not on the first tick
+@njit("float64(float64[::1], int64, float64)", cache=True)
+def _pct_below(buf, n, x):
+    """Percentage of the first n values of buf strictly below x"""
+    count = 0
+    for i in range(n):
+        if buf[i] < x:
+            count += 1
+    return count / n * 100.0
+
+
 class ShortStrangleStrategy:
     def __init__(self, broker: BrokerInterface, trade_manager: TradeManager, notifier: NotificationManager):
         self.broker = broker
         self.trade_manager = trade_manager
         self.notifier = notifier
         self.market_data = MarketData()
-        self.vix_history = []
+        # VIX ring buffer: the last VIX_WINDOW readings, overwritten oldest-first
+        self._vix_buf = np.empty(VIX_WINDOW, dtype=np.float64)
+        self._vix_len = 0
+        self._vix_head = 0
         self.entry_allowed_today = True
         # STATE TRACKING FOR SMART LOGGING
         self.last_entry_decision = None
         self.last_entry_reason = None
         self.entry_checks_today = 0
 
+    def _push_vix(self, vix: float):
+        self._vix_buf[self._vix_head] = vix
+        self._vix_head = (self._vix_head + 1) % VIX_WINDOW
+        if self._vix_len < VIX_WINDOW:
+            self._vix_len += 1
+
     def calculate_iv_percentile(self) -> float:
-        if len(self.vix_history) < 30:
-            self.vix_history.append(self.market_data.india_vix)
+        current_vix = float(self.market_data.india_vix)
+        warming_up = self._vix_len < 30
+        self._push_vix(current_vix)
+        if warming_up:
             return 50.0
-        self.vix_history.append(self.market_data.india_vix)
-        if len(self.vix_history) > 252:
-            self.vix_history.pop(0)
-        current_vix = self.market_data.india_vix
-        below_current = sum(1 for v in self.vix_history if v < current_vix)
-        percentile = (below_current / len(self.vix_history)) * 100
-        return percentile
+        # Order within the ring doesn't matter for a count; slots [0, len) are all filled
+        return _pct_below(self._vix_buf, self._vix_len, current_vix)
 
     def should_enter_trade(self) -> Tuple[bool, str]:
         vix = self.market_data.india_vix
@@ -601,17 +968,21 @@ class ShortStrangleStrategy:
             otm_distance = Config.OTM_DISTANCE_NORMAL + int(
                 vix_position * (Config.OTM_DISTANCE_HIGH_VIX - Config.OTM_DISTANCE_NORMAL))
 
-        ce_strike = round(spot / 50) * 50 + otm_distance
-        pe_strike = round(spot / 50) * 50 - otm_distance
+        atm = int((spot + 25) // 50) * 50  # nearest 50, halves rounded up
+        ce_strike = atm + otm_distance
+        pe_strike = atm - otm_distance
 
         # NEW SEBI RULES: Weekly expiry on TUESDAY (weekday 1), not Thursday
-        # Calculate next Tuesday expiry
-        current = pd.to_datetime(current_date or datetime.now())
+        # Calculate next Tuesday expiry (plain date arithmetic, no pandas scalars)
+        current = current_date or datetime.now()
         days_until_tuesday = (1 - current.weekday()) % 7  # Tuesday is weekday 1
-        if days_until_tuesday == 0 and current.time() >= dt_time(15, 30):
+        if (days_until_tuesday == 0 and isinstance(current, datetime)
+                and current.time() >= Config._MARKET_END):
             # If today is Tuesday after market close, get next Tuesday
             days_until_tuesday = 7
-        expiry = (current + pd.Timedelta(days=days_until_tuesday)).date()
+        expiry = current + timedelta(days=days_until_tuesday)
+        if isinstance(expiry, datetime):
+            expiry = expiry.date()
 
         ce_symbol = Utils.prepare_option_symbol(ce_strike, "CE", expiry)
         pe_symbol = Utils.prepare_option_symbol(pe_strike, "PE", expiry)
@@ -619,7 +990,7 @@ class ShortStrangleStrategy:
         logging.info(f"STRIKES SELECTED: CE={ce_strike}, PE={pe_strike}, OTM Distance={otm_distance}, VIX={vix:.2f}")
         return ce_symbol, pe_symbol
 
-    def execute_entry(self, ce_symbol: str, pe_symbol: str, qty: int):
+    def execute_entry(self, ce_symbol: str, pe_symbol: str, qty: int, ts: Optional[datetime] = None):
         ce_price = self.broker.get_quote(ce_symbol)
         pe_price = self.broker.get_quote(pe_symbol)
         combined_premium = ce_price + pe_price
@@ -627,111 +998,116 @@ class ShortStrangleStrategy:
         logging.info(f"ENTRY EXECUTION: CE={ce_price:.2f}, PE={pe_price:.2f}, Combined={combined_premium:.2f}")
 
         if Config.MIN_COMBINED_PREMIUM <= combined_premium <= Config.MAX_COMBINED_PREMIUM:
-            for symbol, option_type in [(ce_symbol, "CE"), (pe_symbol, "PE")]:
-                price = ce_price if option_type == "CE" else pe_price
+            for symbol, option_type, price in ((ce_symbol, Trade.CE, ce_price), (pe_symbol, Trade.PE, pe_price)):
                 if price > 0:  # Only place order if valid price
                     order_id = self.broker.place_order(symbol, qty, Direction.SELL, price)
                     if order_id:
-                        trade = Trade(order_id, symbol, qty, Direction.SELL, price, datetime.now(), option_type)
+                        trade = Trade(order_id, symbol, qty, Direction.SELL, price, Utils.get_now(ts), option_type)
                         self.trade_manager.add_trade(trade)
         else:
             logging.warning(
                 f"Combined premium Rs.{combined_premium:.2f} outside range [{Config.MIN_COMBINED_PREMIUM}, {Config.MAX_COMBINED_PREMIUM}]")
 
-    def check_trailing_stop(self, trade: Trade) -> bool:
-        pnl_pct = trade.get_pnl_pct()
-        if pnl_pct > 0:
-            required_trailing_level = trade.highest_profit * (1 - Config.TRAILING_STOP_PCT)
-            if trade.trailing_stop_price is None or required_trailing_level > trade.trailing_stop_price:
-                trade.trailing_stop_price = required_trailing_level
-        if trade.trailing_stop_price is not None:
-            current_pnl = trade.get_pnl()
-            if current_pnl < trade.trailing_stop_price:
-                logging.info(f"TRAILING STOP HIT: {trade.symbol}")
-                return True
-        return False
-
-    def check_profit_target(self, trade: Trade) -> bool:
-        pnl_pct = trade.get_pnl_pct()
-        if pnl_pct >= Config.PROFIT_TARGET_PCT * 100:
-            logging.info(f"PROFIT TARGET REACHED: {trade.symbol} at {pnl_pct:.1f}%")
-            return True
-        return False
-
-    def should_roll_position(self, trade: Trade) -> bool:
-        pnl_pct = trade.get_pnl_pct()
-        if pnl_pct <= -Config.ROLL_THRESHOLD_PCT * 100 and trade.rolled_from is None:
-            logging.info(f"ROLL THRESHOLD REACHED: {trade.symbol} at {pnl_pct:.1f}%")
-            return True
-        return False
-
-    def roll_position(self, trade: Trade, current_date: Optional[date] = None):
+    def roll_position(self, trade: Trade, current_date: Optional[date] = None, ts: Optional[datetime] = None):
+        now = Utils.get_now(ts)
         current_strike = trade.strike_price
         roll_distance = 100
-        if trade.option_type == "CE":
+        if trade.option_type == Trade.CE:
             new_strike = current_strike + roll_distance
         else:
             new_strike = current_strike - roll_distance
 
-        expiry = (pd.to_datetime(current_date or datetime.now()) + pd.Timedelta(
-            days=7 - (current_date or datetime.now()).weekday())).date()
-        new_symbol = Utils.prepare_option_symbol(new_strike, trade.option_type, expiry)
+        expiry = (pd.to_datetime(current_date or now) + pd.Timedelta(
+            days=7 - (current_date or now).weekday())).date()
+        new_symbol = Utils.prepare_option_symbol(new_strike, trade.option_type_str, expiry)
         new_price = self.broker.get_quote(new_symbol)
 
         if new_price > 0:
             exit_price = self.broker.get_quote(trade.symbol)
-            self.trade_manager.close_trade(trade.trade_id, exit_price)
+            self.trade_manager.close_trade(trade.trade_id, exit_price, now)
 
             order_id = self.broker.place_order(new_symbol, trade.qty, Direction.SELL, new_price)
             if order_id:
                 new_trade = Trade(order_id, new_symbol, trade.qty, Direction.SELL, new_price,
-                                  datetime.now(), trade.option_type)
+                                  now, trade.option_type, strike_price=new_strike)
                 new_trade.rolled_from = trade.symbol
                 self.trade_manager.add_trade(new_trade)
                 self.trade_manager.rolled_positions += 1
                 logging.info(f"POSITION ROLLED: {trade.symbol} -> {new_symbol}")
 
-    def manage_active_positions(self, backtest_timestamp: Optional[datetime] = None):
-        for trade_id in list(self.trade_manager.active_trades.keys()):
-            trade = self.trade_manager.active_trades[trade_id]
-            current_price = self.broker.get_quote(trade.symbol)
-            if current_price > 0:
-                trade.update_price(current_price)
-
-            if self.check_profit_target(trade):
-                exit_price = self.broker.get_quote(trade.symbol)
-                if exit_price > 0:
-                    self.trade_manager.close_trade(trade_id, exit_price)
-                continue
-
-            if self.check_trailing_stop(trade):
-                exit_price = self.broker.get_quote(trade.symbol)
-                if exit_price > 0:
-                    self.trade_manager.close_trade(trade_id, exit_price)
+    def close_all_positions(self, ts: Optional[datetime] = None):
+        """Close every active trade at one batch of current quotes"""
+        now = Utils.get_now(ts)
+        active = self.trade_manager.active_trades
+        prices = self.broker.get_quotes([t.symbol for t in active.values()])
+        for trade_id in list(active.keys()):
+            exit_price = prices[active[trade_id].symbol]
+            if exit_price > 0:
+                self.trade_manager.close_trade(trade_id, exit_price, now)
+
+    def manage_active_positions(self, backtest_timestamp: Optional[datetime] = None,
+                                now: Optional[datetime] = None):
+        # One clock reading per tick (the simulated clock in backtests) for every exit/roll below
+        if now is None:
+            now = Utils.get_now(backtest_timestamp)
+        active = self.trade_manager.active_trades
+        # One batched quote per tick: it marks every trade to market and prices any exit
+        prices = self.broker.get_quotes([t.symbol for t in active.values()])
+        for trade_id, trade in active.items():
+            if prices[trade.symbol] > 0:
+                self.trade_manager.update_price(trade_id, prices[trade.symbol])
+
+        # Target / trailing-stop / roll decided for all trades in one compiled pass
+        for trade_id, action in self.trade_manager.evaluate_positions().items():
+            if action == EXIT_NONE:
                 continue
-
-            if self.should_roll_position(trade):
-                self.roll_position(trade, backtest_timestamp.date() if backtest_timestamp else None)
+            trade = active[trade_id]
+            if action == EXIT_ROLL:
+                logging.info(f"ROLL THRESHOLD REACHED: {trade.symbol} at {trade.get_pnl_pct():.1f}%")
+                self.roll_position(trade, backtest_timestamp.date() if backtest_timestamp else None, now)
                 continue
+            if action == EXIT_PROFIT_TARGET:
+                logging.info(f"PROFIT TARGET REACHED: {trade.symbol} at {trade.get_pnl_pct():.1f}%")
+            else:
+                logging.info(f"TRAILING STOP HIT: {trade.symbol}")
+            price = prices[trade.symbol]
+            if price > 0:
+                self.trade_manager.close_trade(trade_id, price, now)
 
-        for option_type in ["CE", "PE"]:
+        for option_type in (Trade.CE, Trade.PE):
             if self.trade_manager.check_leg_stop_loss(option_type):
-                logging.warning(f"{option_type} LEG STOP LOSS HIT - Exiting all positions")
-                for trade_id in list(self.trade_manager.active_trades.keys()):
-                    trade = self.trade_manager.active_trades[trade_id]
-                    exit_price = self.broker.get_quote(trade.symbol)
-                    if exit_price > 0:
-                        self.trade_manager.close_trade(trade_id, exit_price)
+                logging.warning(f"{Trade.OPTION_TYPE_NAMES[option_type]} LEG STOP LOSS HIT - Exiting all positions")
+                # Fresh quotes: a roll above may have opened new symbols
+                self.close_all_positions(now)
                 break
 
-    def run_cycle(self, backtest_timestamp: Optional[datetime] = None):
+    @staticmethod
+    def session_flags(timestamps: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorised Utils.is_entry_window / is_square_off_time for a whole day of ticks"""
+        time_of_day = (timestamps - timestamps.dt.normalize()).to_numpy()
+        entry_start = np.timedelta64(pd.Timedelta(Config.ENTRY_START))
+        entry_stop = np.timedelta64(pd.Timedelta(Config.ENTRY_STOP))
+        square_off = np.timedelta64(pd.Timedelta(Config.SQUARE_OFF))
+        in_entry_window = (time_of_day >= entry_start) & (time_of_day <= entry_stop)
+        at_square_off = time_of_day >= square_off
+        return in_entry_window, at_square_off
+
+    def run_cycle(self, backtest_timestamp: Optional[datetime] = None,
+                  in_entry_window: Optional[bool] = None, at_square_off: Optional[bool] = None):
+        now = Utils.get_now(backtest_timestamp)
+        # Backtests pass precomputed session flags (see session_flags); live computes them per cycle
+        if in_entry_window is None:
+            in_entry_window = Utils.is_entry_window(now)
+        if at_square_off is None:
+            at_square_off = Utils.is_square_off_time(now)
+
         self.market_data = self.broker.get_market_data()
         self.market_data.iv_percentile = self.calculate_iv_percentile()
 
-        if Config.PAPER_TRADING or self.broker.backtest_data is not None or Utils.is_market_hours(backtest_timestamp):
-            self.manage_active_positions(backtest_timestamp)
+        if Config.PAPER_TRADING or self.broker.backtest_data is not None or Utils.is_market_hours(now):
+            self.manage_active_positions(backtest_timestamp, now)
 
-            if Utils.is_entry_window(backtest_timestamp) and self.entry_allowed_today:
+            if in_entry_window and self.entry_allowed_today:
                 should_enter, reason = self.should_enter_trade()
                 self.entry_checks_today += 1
 
@@ -742,21 +1118,17 @@ class ShortStrangleStrategy:
                     self.last_entry_reason = reason
 
                 if should_enter:
-                    ce_symbol, pe_symbol = self.select_strike(backtest_timestamp.date() if backtest_timestamp else None)
+                    ce_symbol, pe_symbol = self.select_strike(backtest_timestamp.date() if backtest_timestamp else now)
                     combined_premium = self.broker.get_quote(ce_symbol) + self.broker.get_quote(pe_symbol)
                     if combined_premium > 0:
                         qty = self.calculate_position_size(combined_premium)
-                        self.execute_entry(ce_symbol, pe_symbol, qty)
+                        self.execute_entry(ce_symbol, pe_symbol, qty, now)
                         self.entry_allowed_today = False
 
-            if Utils.is_square_off_time(backtest_timestamp):
+            if at_square_off:
                 if self.trade_manager.active_trades:
                     logging.info("SQUARE OFF TIME - Closing all positions")
-                for trade_id in list(self.trade_manager.active_trades.keys()):
-                    trade = self.trade_manager.active_trades[trade_id]
-                    exit_price = self.broker.get_quote(trade.symbol)
-                    if exit_price > 0:
-                        self.trade_manager.close_trade(trade_id, exit_price)
+                self.close_all_positions(now)
 
     def reset_daily_state(self):
         """Reset daily state for new trading day"""
@@ -766,6 +1138,33 @@ class ShortStrangleStrategy:
         self.entry_checks_today = 0
 
 
+def fmt_table(rows, headers) -> str:
+    """Grid table (tabulate "grid" layout) built in one pass; numbers right-aligned"""
+    widths = [len(str(h)) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(str(cell)))
+
+    def line(fill):
+        return "+" + "+".join(fill * (w + 2) for w in widths) + "+"
+
+    def fmt_row(row):
+        cells = (
+            (str(cell).rjust(w) if isinstance(cell, (int, float)) else str(cell).ljust(w))
+            for cell, w in zip(row, widths)
+        )
+        return "| " + " | ".join(cells) + " |"
+
+    sep = line("-")
+    out = [sep, fmt_row(headers), line("=")]
+    for row in rows:
+        out.append(fmt_row(row))
+        out.append(sep)
+    if not rows:
+        out.append(sep)
+    return "\n".join(out)
+
+
 class ConsoleDashboard:
     def __init__(self):
         self.last_update = 0
@@ -786,14 +1185,14 @@ class ConsoleDashboard:
             ["PE Leg P&L", f"Rs.{trade_manager.pe_pnl:,.2f}"],
             ["Rolled Positions", trade_manager.rolled_positions]
         ]
-        print(tabulate(data, headers=["Metric", "Value"], tablefmt="grid"))
+        print(fmt_table(data, ["Metric", "Value"]))
 
         if trade_manager.active_trades:
             print(f"\n{Fore.CYAN}Active Positions:{Style.RESET_ALL}")
             pos_data = []
             for trade in trade_manager.active_trades.values():
                 pos_data.append([
-                    trade.option_type,
+                    trade.option_type_str,
                     trade.symbol,
                     f"Rs.{trade.entry_price:.2f}",
                     f"Rs.{trade.current_price:.2f}",
@@ -801,12 +1200,45 @@ class ConsoleDashboard:
                     f"Rs.{trade.get_pnl():,.2f}",
                     f"Rs.{trade.trailing_stop_price:.2f}" if trade.trailing_stop_price else "N/A"
                 ])
-            print(tabulate(pos_data, headers=["Type", "Symbol", "Entry", "Current", "P&L%", "P&L", "Trail Stop"],
-                           tablefmt="grid"))
+            print(fmt_table(pos_data, ["Type", "Symbol", "Entry", "Current", "P&L%", "P&L", "Trail Stop"]))
 
         self.last_update = time.time()
 
 
+_MARKET_CLOSE = dt_time(15, 30)
+
+
+def calculate_strikes_vec(spots: np.ndarray, vixes: np.ndarray, dates: np.ndarray,
+                          after_close: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorised strike/expiry calculation over arrays of opening spot, VIX and datetime64[D] dates"""
+    otm = np.where(vixes > Config.VIX_THRESHOLD, Config.OTM_DISTANCE_HIGH_VIX, Config.OTM_DISTANCE_NORMAL)
+    base = np.round(spots / 50) * 50
+    # NEW SEBI RULES: Weekly expiry on TUESDAY (weekday 1), not Thursday
+    # datetime64 epoch (1970-01-01) is a Thursday, i.e. weekday 3
+    weekdays = (dates.astype('datetime64[D]').astype(np.int64) + 3) % 7
+    days_until_tuesday = (1 - weekdays) % 7  # Tuesday is weekday 1
+    if after_close is not None:
+        # On Tuesday after market close, roll to next Tuesday
+        days_until_tuesday = np.where((days_until_tuesday == 0) & after_close, 7, days_until_tuesday)
+    expiry = dates.astype('datetime64[D]') + days_until_tuesday.astype('timedelta64[D]')
+    return base + otm, base - otm, expiry
+
+
+def calculate_strikes(spot: float, vix: float, current_date: date) -> Tuple[float, float, date]:
+    """Calculate CE/PE strikes and expiry for one day (single-value form of calculate_strikes_vec)"""
+    after_close = isinstance(current_date, datetime) and current_date.time() >= _MARKET_CLOSE
+    day = current_date.date() if isinstance(current_date, datetime) else current_date
+    ce, pe, expiry = calculate_strikes_vec(
+        np.array([spot], dtype=np.float64), np.array([vix], dtype=np.float64),
+        np.array([day], dtype='datetime64[D]'), np.array([after_close])
+    )
+    return float(ce[0]), float(pe[0]), expiry[0].item()
+
+
+# Lets the data manager build the per-day strike table in a single pass
+calculate_strikes.batch = calculate_strikes_vec
+
+
 def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force_refresh: bool = False):
     # Configure logging with UTF-8 encoding
     logging.basicConfig(
@@ -833,28 +1265,6 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
     # Initialize historical data manager
     data_manager = HistoricalDataManager(broker.kite, Config.BACKTEST_CACHE_DIR)
 
-    # Define strike calculator function
-    def calculate_strikes(spot: float, vix: float, current_date: date) -> Tuple[float, float, date]:
-        """Calculate CE/PE strikes and expiry based on spot and VIX"""
-        if vix > Config.VIX_THRESHOLD:
-            otm_distance = Config.OTM_DISTANCE_HIGH_VIX
-        else:
-            otm_distance = Config.OTM_DISTANCE_NORMAL
-
-        ce_strike = round(spot / 50) * 50 + otm_distance
-        pe_strike = round(spot / 50) * 50 - otm_distance
-
-        # NEW SEBI RULES: Weekly expiry on TUESDAY (weekday 1), not Thursday
-        # Calculate next Tuesday expiry
-        current = pd.to_datetime(current_date)
-        days_until_tuesday = (1 - current.weekday()) % 7  # Tuesday is weekday 1
-        if days_until_tuesday == 0 and current.time() >= pd.Timestamp('15:30').time():
-            # If today is Tuesday after market close, get next Tuesday
-            days_until_tuesday = 7
-        expiry = (current + pd.Timedelta(days=days_until_tuesday)).date()
-
-        return ce_strike, pe_strike, expiry
-
     print(f"{Fore.YELLOW}Downloading and preparing historical data...{Style.RESET_ALL}")
     print(f"Cache mode: {'REFRESH' if force_refresh else 'USE EXISTING'}")
 
@@ -866,7 +1276,14 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
 
         # Save to CSV for inspection
         output_file = "backtest_data_production.csv"
-        backtest_data.to_csv(output_file, index=False)
+        if PYARROW_AVAILABLE:
+            # Arrow's C++ CSV writer; keep exchange wall-clock times (Arrow would emit UTC)
+            export_df = backtest_data
+            if export_df['timestamp'].dt.tz is not None:
+                export_df = export_df.assign(timestamp=export_df['timestamp'].dt.tz_localize(None))
+            pa_csv.write_csv(pa.Table.from_pandas(export_df, preserve_index=False), output_file)
+        else:
+            backtest_data.to_csv(output_file, index=False)
         print(f"{Fore.GREEN}Backtest data saved to: {output_file}{Style.RESET_ALL}")
         print(f"Total data points: {len(backtest_data)}")
         print(f"Date range: {backtest_data['timestamp'].min()} to {backtest_data['timestamp'].max()}")
@@ -876,10 +1293,14 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
         logging.error(f"Backtest data preparation failed: {e}", exc_info=True)
         return
 
+    # Sorted, position-indexed data: day slices become searchsorted bounds and
+    # broker.current_index (used with iloc) stays a plain row position
+    backtest_data = backtest_data.sort_values('timestamp', kind='stable', ignore_index=True)
+
     # Initialize trading components
     Config.PAPER_TRADING = True
     broker.backtest_data = backtest_data
-    db = DatabaseManager(Config.DB_FILE)
+    db = DatabaseManager(Config.DB_FILE, trade_batch_size=Config.BACKTEST_DB_TRADE_BATCH)
     notifier = NotificationManager()
     trade_manager = TradeManager(broker, db, notifier)
     strategy = ShortStrangleStrategy(broker, trade_manager, notifier)
@@ -887,49 +1308,88 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
 
     print(f"\n{Fore.CYAN}Starting backtest simulation...{Style.RESET_ALL}\n")
 
+    # Day boundaries via binary search on the sorted timestamps (zero-copy iloc slices)
+    ts_series = backtest_data['timestamp']
+    if ts_series.dt.tz is not None:
+        ts_series = ts_series.dt.tz_localize(None)  # compare on exchange wall-clock time
+    ts_values = ts_series.to_numpy()
+    one_day = np.timedelta64(1, 'D')
+
     # Run backtest day by day
-    trading_days = pd.date_range(start_date, end_date, freq='D')
-    total_days = len([d for d in trading_days if not Utils.is_holiday(d.date())])
+    # Trading days straight from a numpy business-day calendar (weekends + listed holidays)
+    cal = np.busdaycalendar(weekmask='1111100',
+                            holidays=np.array(sorted(Config.MARKET_HOLIDAYS), dtype='datetime64[D]'))
+    all_days = np.arange(np.datetime64(start_date), np.datetime64(end_date) + np.timedelta64(1, 'D'),
+                         dtype='datetime64[D]')
+    trading_days = pd.DatetimeIndex(all_days[np.is_busday(all_days, busdaycal=cal)])
+    total_days = len(trading_days)
     current_day = 0
+    pending_perf = []  # daily_performance rows, written in one transaction after the loop
 
-    for current_date in trading_days:
-        if Utils.is_holiday(current_date.date()):
-            continue
+    # Bound once - saves the attribute lookup on every tick
+    run_cycle = strategy.run_cycle
 
+    for current_date in trading_days:
         current_day += 1
-        daily_data = backtest_data[backtest_data['timestamp'].dt.date == current_date.date()]
-        if daily_data.empty:
+        cd = current_date.date()
+        cd_str = cd.isoformat()
+        day_start = np.datetime64(cd)
+        lo = np.searchsorted(ts_values, day_start, side='left')
+        hi = np.searchsorted(ts_values, day_start + one_day, side='left')
+        if lo == hi:
             continue
+        daily_data = backtest_data.iloc[lo:hi]
 
         print(
-            f"\n{Fore.YELLOW}[Day {current_day}/{total_days}] Trading Day: {current_date.strftime('%Y-%m-%d')}{Style.RESET_ALL}")
+            f"\n{Fore.YELLOW}[Day {current_day}/{total_days}] Trading Day: {cd_str}{Style.RESET_ALL}")
 
         # Reset daily state
         strategy.reset_daily_state()
 
         # Simulate intraday trading with progress indicator
         total_ticks = len(daily_data)
-        last_progress = 0
+        # First tick index at which each 10% step is reached (no per-tick division)
+        milestones = {-(-pct * total_ticks // 100): pct for pct in range(10, 100, 10)}
+
+        # Pre-built (row index, timestamp, session flags) records; no per-tick indexing
+        # into the frame. tolist() yields Timestamps (run_cycle needs .time()/.date())
+        entry_flags, square_off_flags = ShortStrangleStrategy.session_flags(daily_data['timestamp'])
+        # Rows are positional (RangeIndex, sliced lo:hi), so the row index is just range(lo, hi)
+        records = list(zip(range(lo, hi), daily_data['timestamp'].tolist(),
+                           entry_flags.tolist(), square_off_flags.tolist()))
+
+        # tqdm buffers and rate-limits its own redraws; plain prints are the fallback
+        progress_bar = tqdm(records, desc=f"  Day {current_day}", leave=False, mininterval=0.5) \
+            if TQDM_AVAILABLE else None
+
+        tick_iter = progress_bar if progress_bar is not None else records
 
-        for idx, index in enumerate(daily_data.index):
+        for idx, (index, current_time, in_entry_window, at_square_off) in enumerate(tick_iter):
             broker.current_index = index
-            current_time = daily_data.loc[index, 'timestamp']
 
-            strategy.run_cycle(current_time)
+            run_cycle(current_time, in_entry_window, at_square_off)
 
             # Show progress every 10%
-            progress = int((idx / total_ticks) * 100)
-            if progress >= last_progress + 10:
-                print(f"  Progress: {progress}% | Time: {current_time.strftime('%H:%M')} | "
-                      f"VIX: {strategy.market_data.india_vix:.2f} | "
-                      f"Active Trades: {len(trade_manager.active_trades)}", end='\r')
-                last_progress = progress
+            if idx in milestones:
+                status = (f"Time: {current_time.strftime('%H:%M')} | "
+                          f"VIX: {strategy.market_data.india_vix:.2f} | "
+                          f"Active Trades: {len(trade_manager.active_trades)}")
+                if progress_bar is not None:
+                    progress_bar.set_postfix_str(status, refresh=False)
+                else:
+                    print(f"  Progress: {milestones[idx]}% | {status}", end='\r')
+
+        if progress_bar is not None:
+            progress_bar.close()
+        else:
+            print()  # New line after progress
 
-        print()  # New line after progress
+        # Backtest bars are trading days: one commit covers all of the day's entries and exits
+        trade_manager.end_of_bar()
 
         # End of day summary
         metrics = trade_manager.get_performance_metrics()
-        db.save_daily_performance(current_date.strftime('%Y-%m-%d'), metrics)
+        pending_perf.append((cd_str, metrics))
 
         # Log daily results
         day_summary = (
@@ -944,13 +1404,17 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
         # Reset daily metrics for next day
         trade_manager.reset_daily_metrics()
 
+    db.save_daily_performance_batch(pending_perf)
+
     # Final backtest summary
     print(f"\n{'=' * 80}")
     print(f"{Fore.CYAN}BACKTEST SUMMARY - {start_date} to {end_date}{Style.RESET_ALL}")
     print(f"{'=' * 80}")
 
     final_metrics = trade_manager.get_performance_metrics()
-    cumulative_pnl = sum(trade_manager.daily_pnl_history)
+    # One array for every summary reduction below
+    daily_pnl_array = np.asarray(trade_manager.daily_pnl_history, dtype=np.float64)
+    cumulative_pnl = float(daily_pnl_array.sum())
 
     summary_data = [
         ["Total Trades", final_metrics.total_trades],
@@ -961,23 +1425,22 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
         ["Profit Factor", f"{final_metrics.profit_factor:.2f}"],
         ["Sharpe Ratio", f"{final_metrics.sharpe_ratio:.2f}"],
         ["Rolled Positions", final_metrics.rolled_positions],
-        ["Trading Days", len(trade_manager.daily_pnl_history)],
+        ["Trading Days", daily_pnl_array.size],
         ["Avg Daily P&L",
-         f"Rs.{cumulative_pnl / len(trade_manager.daily_pnl_history):,.2f}" if trade_manager.daily_pnl_history else "N/A"]
+         f"Rs.{cumulative_pnl / daily_pnl_array.size:,.2f}" if daily_pnl_array.size else "N/A"]
     ]
-    print(tabulate(summary_data, headers=["Metric", "Value"], tablefmt="grid"))
+    print(fmt_table(summary_data, ["Metric", "Value"]))
 
     # Show P&L distribution
-    if trade_manager.daily_pnl_history:
+    if daily_pnl_array.size:
         print(f"\n{Fore.CYAN}Daily P&L Distribution:{Style.RESET_ALL}")
-        daily_pnl_array = np.array(trade_manager.daily_pnl_history)
-        print(f"  Min Daily P&L: Rs.{np.min(daily_pnl_array):,.2f}")
-        print(f"  Max Daily P&L: Rs.{np.max(daily_pnl_array):,.2f}")
+        print(f"  Min Daily P&L: Rs.{daily_pnl_array.min():,.2f}")
+        print(f"  Max Daily P&L: Rs.{daily_pnl_array.max():,.2f}")
         print(f"  Median Daily P&L: Rs.{np.median(daily_pnl_array):,.2f}")
-        print(f"  Std Dev: Rs.{np.std(daily_pnl_array):,.2f}")
+        print(f"  Std Dev: Rs.{daily_pnl_array.std():,.2f}")
 
-        winning_days = len([p for p in daily_pnl_array if p > 0])
-        total_days = len(daily_pnl_array)
+        winning_days = int((daily_pnl_array > 0).sum())
+        total_days = daily_pnl_array.size
         print(f"  Winning Days: {winning_days}/{total_days} ({winning_days / total_days * 100:.1f}%)")
 
     # Export detailed results
@@ -986,18 +1449,12 @@ def backtest_main(broker: BrokerInterface, start_date: str, end_date: str, force
     print(f"  Backtest Data: backtest_data_production.csv")
     print(f"  Log File: {Config.LOG_FILE}")
 
-    # Export trades to CSV
-    all_trades = db.get_all_trades()
-    if not all_trades.empty:
-        trades_file = f"backtest_trades_{start_date}_to_{end_date}.csv"
-        all_trades.to_csv(trades_file, index=False)
+    # Export trades and daily performance straight from SQLite
+    trades_file = f"backtest_trades_{start_date}_to_{end_date}.csv"
+    if db.export_trades_to_csv(trades_file):
         print(f"  All Trades: {trades_file}")
-
-    # Export daily performance
-    daily_perf = db.get_performance_history(days=1000)
-    if not daily_perf.empty:
-        perf_file = f"backtest_daily_performance_{start_date}_to_{end_date}.csv"
-        daily_perf.to_csv(perf_file, index=False)
+    perf_file = f"backtest_daily_performance_{start_date}_to_{end_date}.csv"
+    if db.export_daily_performance_to_csv(perf_file):
         print(f"  Daily Performance: {perf_file}")
 
     print(f"\n{Fore.GREEN}Backtest completed successfully!{Style.RESET_ALL}\n")
@@ -1100,11 +1557,7 @@ def main():
         # Close any open positions
         if trade_manager.active_trades:
             print(f"Closing {len(trade_manager.active_trades)} open positions...")
-            for trade_id in list(trade_manager.active_trades.keys()):
-                trade = trade_manager.active_trades[trade_id]
-                exit_price = broker.get_quote(trade.symbol)
-                if exit_price > 0:
-                    trade_manager.close_trade(trade_id, exit_price)
+            strategy.close_all_positions()
 
         # Save final metrics
         metrics = trade_manager.get_performance_metrics()
@@ -1114,12 +1567,14 @@ def main():
         print(f"Total P&L: Rs.{metrics.total_pnl:,.2f}")
 
         notifier.send_alert("System shutdown", "INFO")
+        notifier.close()
         db.close()
 
     except Exception as e:
         print(f"{Fore.RED}Fatal error: {e}{Style.RESET_ALL}")
         logging.error(f"Fatal error: {e}", exc_info=True)
         notifier.send_alert(f"Fatal error: {e}", "ERROR")
+        notifier.close()
         db.close()
 
 
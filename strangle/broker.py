@@ -6,11 +6,14 @@ This version uses HTTP polling instead of WebSocket to avoid signal/threading co
 WebSocket can be enabled later once system is stable.
 """
 
+import importlib.util
 import logging
 import time
+from collections import OrderedDict
 from datetime import datetime, date
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+import numpy as np
 import pandas as pd
 from kiteconnect import KiteConnect
 
@@ -19,8 +22,17 @@ from .models import Direction, MarketData
 from .utils import Utils
 from .greeks_calculator import GreeksCalculator
 
+# Parquet needs pyarrow; without it the instruments list is only cached in memory
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
 
 class BrokerInterface:
+    QUOTE_CACHE_MAX = 1024  # symbols kept in the live quote cache
+    INSTRUMENTS_CACHE_TTL = 3600  # seconds; applies to the in-memory and on-disk instruments
+    # Numeric backtest columns load_day pulls out as float64 arrays (missing ones read as 0.0)
+    DAY_COLUMNS = ('nifty_spot', 'nifty_future', 'nifty_open', 'nifty_high', 'nifty_low',
+                   'india_vix', 'vix_30day_avg', 'ce_price', 'pe_price')
+
     def __init__(self, backtest_data: pd.DataFrame = None):
         self.kite = KiteConnect(api_key=Config.API_KEY)
         self.backtest_data = backtest_data
@@ -31,10 +43,25 @@ class BrokerInterface:
         # Live trading components (HTTP-based)
         self.instruments_cache: Optional[pd.DataFrame] = None
         self.instruments_cache_time: Optional[datetime] = None
+        # (strike, CE/PE, expiry date) -> instrument row, rebuilt with instruments_cache
+        self.instruments_index: Dict[Tuple[float, str, date], tuple] = {}
         self.pending_orders: Dict[str, Dict] = {}
-        self.quote_cache: Dict[str, Dict] = {}  # Cache quotes to reduce API calls
+        # Cache quotes to reduce API calls (bounded, oldest symbol evicted first)
+        self.quote_cache: "OrderedDict[str, float]" = OrderedDict()
         self.quote_cache_time: Dict[str, datetime] = {}
 
+        # Current backtest day as plain arrays (see load_day); rows [_day_start, _day_start + _day_len)
+        self._day_cols: Dict[str, np.ndarray] = {}
+        self._day_ts: List[pd.Timestamp] = []
+        self._day_ce_symbols: List[str] = []
+        self._day_pe_symbols: List[str] = []
+        self._day_start = 0
+        self._day_len = 0
+        # iloc row for current_index outside a loaded day, fetched once per index
+        self._row: Optional[pd.Series] = None
+        self._row_index = -1
+        self._row_source: Optional[pd.DataFrame] = None
+
         if self.backtest_data is not None:
             self.backtest_data['timestamp'] = pd.to_datetime(self.backtest_data['timestamp'])
             logging.info(
@@ -90,7 +117,7 @@ class BrokerInterface:
     def fetch_instruments(self, force_refresh: bool = False) -> pd.DataFrame:
         """
         Fetch and cache NFO instruments
-        Cache valid for 1 hour to reduce API calls
+        Cache valid for 1 hour to reduce API calls (plus a per-day parquet copy on disk)
         """
         if self.backtest_data is not None:
             return pd.DataFrame()
@@ -101,10 +128,24 @@ class BrokerInterface:
             self.instruments_cache_time is not None):
 
             cache_age = (datetime.now() - self.instruments_cache_time).seconds
-            if cache_age < 3600:  # 1 hour
+            if cache_age < self.INSTRUMENTS_CACHE_TTL:
                 logging.debug(f"Using cached instruments (age: {cache_age}s)")
                 return self.instruments_cache
 
+        # Reuse today's on-disk copy while it is younger than the same TTL
+        # (e.g. across restarts); an older file falls through to a network refresh
+        disk_cache = self._instruments_disk_cache_path()
+        disk_mtime = self._fresh_mtime(disk_cache) if not force_refresh else None
+        if disk_mtime is not None:
+            try:
+                nifty_options = pd.read_parquet(disk_cache)
+                # Age the in-memory copy from the file, not from this load
+                self._set_instruments_cache(nifty_options, datetime.fromtimestamp(disk_mtime))
+                logging.info(f"✓ Loaded {len(nifty_options)} NIFTY option instruments from {disk_cache.name}")
+                return nifty_options
+            except Exception as e:
+                logging.warning(f"Failed to read instruments cache {disk_cache}: {e}")
+
         try:
             logging.info("Fetching live NFO instruments...")
             instruments = self.kite.instruments("NFO")
@@ -116,8 +157,15 @@ class BrokerInterface:
                 (df['instrument_type'].isin(['CE', 'PE']))
             ].copy()
 
-            self.instruments_cache = nifty_options
-            self.instruments_cache_time = datetime.now()
+            self._set_instruments_cache(nifty_options)
+
+            if disk_cache is not None:
+                try:
+                    disk_cache.parent.mkdir(parents=True, exist_ok=True)
+                    nifty_options.to_parquet(disk_cache, compression='zstd', index=False)
+                    self._prune_instruments_disk_cache(disk_cache)
+                except Exception as e:
+                    logging.warning(f"Failed to write instruments cache {disk_cache}: {e}")
 
             logging.info(f"✓ Cached {len(nifty_options)} NIFTY option instruments")
             return nifty_options
@@ -129,6 +177,59 @@ class BrokerInterface:
                 return self.instruments_cache
             return pd.DataFrame()
 
+    def _set_instruments_cache(self, nifty_options: pd.DataFrame, fetched_at: Optional[datetime] = None):
+        """Store the instruments frame and rebuild the (strike, type, expiry) lookup index"""
+        if not nifty_options.empty and not pd.api.types.is_datetime64_any_dtype(nifty_options['expiry']):
+            nifty_options['expiry'] = pd.to_datetime(nifty_options['expiry'])
+        self.instruments_cache = nifty_options
+        self.instruments_cache_time = fetched_at or datetime.now()
+
+        index = {}
+        duplicates = 0
+        if not nifty_options.empty:
+            rows = nifty_options[
+                ['tradingsymbol', 'instrument_token', 'exchange', 'strike', 'instrument_type', 'expiry']
+            ].itertuples(index=False)
+            for row in rows:
+                key = (float(row.strike), row.instrument_type, row.expiry.date())
+                # First listing wins, same as matches.iloc[0] did
+                if key in index:
+                    duplicates += 1
+                else:
+                    index[key] = row
+        if duplicates:
+            logging.warning(f"{duplicates} instrument(s) share a strike/type/expiry with an earlier listing; "
+                            f"lookups use the first match")
+        self.instruments_index = index
+
+    @staticmethod
+    def _instruments_disk_cache_path() -> Optional[Path]:
+        """Per-day parquet file for the NIFTY option instruments (None without pyarrow)"""
+        if not PYARROW_AVAILABLE:
+            return None
+        return Path(Config.BACKTEST_CACHE_DIR) / f"nfo_instruments_{date.today().isoformat()}.parquet"
+
+    @classmethod
+    def _fresh_mtime(cls, path: Optional[Path]) -> Optional[float]:
+        """mtime of `path` if it exists and is younger than INSTRUMENTS_CACHE_TTL, else None"""
+        if path is None:
+            return None
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        return mtime if time.time() - mtime < cls.INSTRUMENTS_CACHE_TTL else None
+
+    @staticmethod
+    def _prune_instruments_disk_cache(keep: Path):
+        """Delete earlier days' instrument files so they don't pile up in the cache dir"""
+        for old in keep.parent.glob("nfo_instruments_*.parquet"):
+            if old != keep:
+                try:
+                    old.unlink()
+                except OSError as e:
+                    logging.debug(f"Could not remove stale instruments cache {old}: {e}")
+
     def find_live_option_symbol(self, strike: float, option_type: str,
                                 expiry: date) -> Optional[Dict]:
         """
@@ -142,53 +243,16 @@ class BrokerInterface:
             logging.error("No instruments available")
             return None
 
-        # ═══════════════════════════════════════════════════════════════
-        # FIX: Ensure expiry column is datetime type
-        # ═══════════════════════════════════════════════════════════════
-
-        # Convert expiry column to datetime if it isn't already
-        if not pd.api.types.is_datetime64_any_dtype(instruments['expiry']):
-            try:
-                instruments['expiry'] = pd.to_datetime(instruments['expiry'])
-                logging.debug("Converted expiry column to datetime")
-            except Exception as e:
-                logging.error(f"Failed to convert expiry column to datetime: {e}")
-                return None
-
         # Convert input expiry to datetime for comparison
         if isinstance(expiry, date) and not isinstance(expiry, datetime):
             expiry_dt = datetime.combine(expiry, datetime.min.time())
         else:
             expiry_dt = expiry
 
-        # ═══════════════════════════════════════════════════════════════
-        # Filter by strike, type, and expiry
-        # ═══════════════════════════════════════════════════════════════
+        # O(1) lookup in the index built alongside instruments_cache
+        instrument = self.instruments_index.get((float(strike), option_type.upper(), expiry_dt.date()))
 
-        try:
-            matches = instruments[
-                (instruments['strike'] == strike) &
-                (instruments['instrument_type'] == option_type.upper()) &
-                (instruments['expiry'].dt.date == expiry_dt.date())
-                ]
-        except Exception as e:
-            logging.error(f"Error filtering instruments: {e}")
-            # Fallback: try without .dt accessor
-            try:
-                # Convert expiry column to date objects for comparison
-                instruments['expiry_date'] = instruments['expiry'].apply(
-                    lambda x: x.date() if hasattr(x, 'date') else x
-                )
-                matches = instruments[
-                    (instruments['strike'] == strike) &
-                    (instruments['instrument_type'] == option_type.upper()) &
-                    (instruments['expiry_date'] == expiry_dt.date())
-                    ]
-            except Exception as e2:
-                logging.error(f"Fallback filtering also failed: {e2}")
-                return None
-
-        if matches.empty:
+        if instrument is None:
             logging.error(
                 f"No live symbol found for Strike={strike}, Type={option_type}, "
                 f"Expiry={expiry_dt.date()}"
@@ -203,22 +267,53 @@ class BrokerInterface:
                 logging.info(f"Available expiries for {strike} {option_type}: {available_expiries[:5]}")
             return None
 
-        if len(matches) > 1:
-            logging.warning(f"Multiple matches found for {strike} {option_type}, using first")
-
-        instrument = matches.iloc[0]
-
         result = {
-            'tradingsymbol': instrument['tradingsymbol'],
-            'instrument_token': instrument['instrument_token'],
-            'exchange': instrument['exchange'],
-            'strike': instrument['strike'],
-            'expiry': instrument['expiry']
+            'tradingsymbol': instrument.tradingsymbol,
+            'instrument_token': instrument.instrument_token,
+            'exchange': instrument.exchange,
+            'strike': instrument.strike,
+            'expiry': instrument.expiry
         }
 
         logging.info(f"✓ Found: {result['tradingsymbol']} (Token: {result['instrument_token']})")
         return result
 
+    # ═══════════════════════════════════════════════════════════
+    # BACKTEST DAY ARRAYS
+    # ═══════════════════════════════════════════════════════════
+
+    def load_day(self, day_data: pd.DataFrame, start: int):
+        """
+        Extract one day's rows (backtest_data positions start..start+len) into
+        arrays once, so per-tick quotes and market data are list/array reads
+        instead of an iloc row Series per call
+        """
+        n = len(day_data)
+        self._day_cols = {
+            name: (day_data[name].to_numpy(dtype=np.float64) if name in day_data.columns
+                   else np.zeros(n, dtype=np.float64))
+            for name in self.DAY_COLUMNS
+        }
+        self._day_ts = day_data['timestamp'].tolist()
+        self._day_ce_symbols = day_data['ce_symbol'].tolist() if 'ce_symbol' in day_data.columns else [''] * n
+        self._day_pe_symbols = day_data['pe_symbol'].tolist() if 'pe_symbol' in day_data.columns else [''] * n
+        self._day_start = start
+        self._day_len = n
+
+    def _day_position(self) -> Optional[int]:
+        """current_index within the loaded day, or None if it falls outside it"""
+        i = self.current_index - self._day_start
+        return i if 0 <= i < self._day_len else None
+
+    def _current_row(self) -> pd.Series:
+        """backtest_data.iloc[current_index], shared by every read at the same index"""
+        data = self.backtest_data
+        if self._row_index != self.current_index or self._row_source is not data:
+            self._row = data.iloc[self.current_index]
+            self._row_index = self.current_index
+            self._row_source = data
+        return self._row
+
     # ═══════════════════════════════════════════════════════════
     # HTTP-BASED QUOTE FETCHING (with caching to reduce API calls)
     # ═══════════════════════════════════════════════════════════
@@ -229,48 +324,60 @@ class BrokerInterface:
         Cache is valid for 1 second to balance freshness vs API limits
         """
         if self.backtest_data is not None:
-            # Existing backtest logic (unchanged)
-            current_row = self.backtest_data.iloc[self.current_index]
-            market_data = self.get_market_data()
-
-            ce_symbol = current_row.get('ce_symbol', '')
-            pe_symbol = current_row.get('pe_symbol', '')
+            # Everything below reads one row: the day arrays, or a single cached iloc
+            i = self._day_position()
+            if i is not None:
+                cols = self._day_cols
+                ce_symbol = self._day_ce_symbols[i]
+                pe_symbol = self._day_pe_symbols[i]
+                ce_price = cols['ce_price'][i]
+                pe_price = cols['pe_price'][i]
+                nifty_spot = cols['nifty_spot'][i]
+                india_vix = cols['india_vix'][i]
+                timestamp = self._day_ts[i]
+            else:
+                current_row = self._current_row()
+                ce_symbol = current_row.get('ce_symbol', '')
+                pe_symbol = current_row.get('pe_symbol', '')
+                ce_price = current_row.get('ce_price', 0.0)
+                pe_price = current_row.get('pe_price', 0.0)
+                nifty_spot = current_row.get('nifty_spot', 0.0)
+                india_vix = current_row.get('india_vix', 0.0)
+                timestamp = current_row['timestamp']
 
             if symbol == ce_symbol:
-                price = current_row.get('ce_price', 0.0)
-                if pd.notna(price) and price > 0:
-                    return float(price)
+                if pd.notna(ce_price) and ce_price > 0:
+                    return float(ce_price)
 
             elif symbol == pe_symbol:
-                price = current_row.get('pe_price', 0.0)
-                if pd.notna(price) and price > 0:
-                    return float(price)
+                if pd.notna(pe_price) and pe_price > 0:
+                    return float(pe_price)
 
             # Fallback to Black-Scholes
             parsed = Utils.parse_option_symbol(symbol)
             if parsed:
                 _, strike, option_type = parsed
-                current_date = market_data.timestamp.date()
+                current_date = timestamp.date()
                 days_to_add = (Config.WEEKLY_EXPIRY_DAY - current_date.weekday()) % 7
                 if days_to_add == 0:
                     days_to_add = 7
                 expiry = current_date + pd.Timedelta(days=days_to_add)
                 dte = self.greeks_calc.get_dte(expiry, current_date)
 
-                if dte < 0 or market_data.india_vix <= 0 or market_data.nifty_spot <= 0:
+                if dte < 0 or india_vix <= 0 or nifty_spot <= 0:
                     return 0.0
 
                 price = self.greeks_calc.get_option_price(
-                    spot=market_data.nifty_spot,
+                    spot=nifty_spot,
                     strike=strike,
                     dte=dte,
-                    volatility=market_data.india_vix,
+                    volatility=india_vix,
                     option_type=option_type
                 )
 
                 return max(0.0, min(price, 5000.0))
             else:
-                return market_data.nifty_spot
+                return nifty_spot
 
         # ═══════════════════════════════════════════════════════════
         # LIVE TRADING MODE - HTTP with smart caching
@@ -293,8 +400,7 @@ class BrokerInterface:
                 return 0.0
 
             # Update cache
-            self.quote_cache[symbol] = price
-            self.quote_cache_time[symbol] = datetime.now()
+            self._cache_quote(symbol, price)
 
             return price
 
@@ -306,6 +412,15 @@ class BrokerInterface:
                 return self.quote_cache[symbol]
             return 0.0
 
+    def _cache_quote(self, symbol: str, price: float):
+        """Store a quote, evicting the oldest symbol once the cache is full"""
+        self.quote_cache[symbol] = price
+        self.quote_cache.move_to_end(symbol)
+        self.quote_cache_time[symbol] = datetime.now()
+        if len(self.quote_cache) > self.QUOTE_CACHE_MAX:
+            stale_symbol, _ = self.quote_cache.popitem(last=False)
+            self.quote_cache_time.pop(stale_symbol, None)
+
     def get_batch_quotes(self, symbols: List[str]) -> Dict[str, float]:
         """
         Fetch multiple quotes in one API call (more efficient)
@@ -323,8 +438,7 @@ class BrokerInterface:
                     if 0 < price < 10000:
                         result[symbol] = price
                         # Update cache
-                        self.quote_cache[symbol] = price
-                        self.quote_cache_time[symbol] = datetime.now()
+                        self._cache_quote(symbol, price)
                     else:
                         result[symbol] = 0.0
                 else:
@@ -587,17 +701,17 @@ class BrokerInterface:
             positions = self.kite.positions()
             net_positions = positions.get('net', [])
 
-            active_positions = {}
-            for pos in net_positions:
-                if pos['quantity'] != 0:
-                    symbol = pos['tradingsymbol']
-                    active_positions[symbol] = {
-                        'quantity': pos['quantity'],
-                        'average_price': pos['average_price'],
-                        'last_price': pos['last_price'],
-                        'pnl': pos['pnl'],
-                        'product': pos['product']
-                    }
+            # Single pass: flat (quantity 0) positions are dropped in the comprehension
+            active_positions = {
+                pos['tradingsymbol']: {
+                    'quantity': pos['quantity'],
+                    'average_price': pos['average_price'],
+                    'last_price': pos['last_price'],
+                    'pnl': pos['pnl'],
+                    'product': pos['product']
+                }
+                for pos in net_positions if pos['quantity']
+            }
 
             if active_positions:
                 logging.info(f"✓ Reconciled {len(active_positions)} active positions")
@@ -628,7 +742,22 @@ class BrokerInterface:
     def get_market_data(self) -> MarketData:
         """Get current market data"""
         if self.backtest_data is not None:
-            row = self.backtest_data.iloc[self.current_index]
+            i = self._day_position()
+            if i is not None:
+                cols = self._day_cols
+                return MarketData(
+                    nifty_spot=cols['nifty_spot'][i],
+                    nifty_future=cols['nifty_future'][i],
+                    nifty_open=cols['nifty_open'][i],
+                    nifty_high=cols['nifty_high'][i],
+                    nifty_low=cols['nifty_low'][i],
+                    india_vix=cols['india_vix'][i],
+                    vix_30day_avg=cols['vix_30day_avg'][i],
+                    timestamp=self._day_ts[i],
+                    ce_symbol=self._day_ce_symbols[i],
+                    pe_symbol=self._day_pe_symbols[i]
+                )
+            row = self._current_row()
             return MarketData(
                 nifty_spot=row.get('nifty_spot', 0.0),
                 nifty_future=row.get('nifty_future', 0.0),
@@ -649,10 +778,8 @@ class BrokerInterface:
             india_vix = quotes["NSE:INDIA VIX"]['last_price']
 
             # Cache the quotes
-            self.quote_cache["NSE:NIFTY 50"] = nifty_spot
-            self.quote_cache["NSE:INDIA VIX"] = india_vix
-            self.quote_cache_time["NSE:NIFTY 50"] = datetime.now()
-            self.quote_cache_time["NSE:INDIA VIX"] = datetime.now()
+            self._cache_quote("NSE:NIFTY 50", nifty_spot)
+            self._cache_quote("NSE:INDIA VIX", india_vix)
 
             return MarketData(
                 nifty_spot=nifty_spot,
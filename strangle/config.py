@@ -85,6 +85,7 @@ class Config:
     # System Config
     UPDATE_INTERVAL = 1
     DB_FILE = "trades_database.db" # Keep DB in root
+    BACKTEST_DB_TRADE_BATCH = 1000 # Trade rows buffered per SQLite commit in backtests
     BACKTEST_CACHE_DIR = "back_test_cache"
 
     DRY_RUN_MODE = True  # Set to False for actual trading
@@ -97,6 +98,10 @@ class Config:
     # Expiry
     WEEKLY_EXPIRY_DAY = 1
 
+    # Exchange holidays (weekday closures), ISO dates "YYYY-MM-DD"; a frozenset so
+    # Utils.is_holiday and the backtest calendar always read the same, O(1)-lookup values
+    MARKET_HOLIDAYS = frozenset()
+
     # Legacy Params
     OTM_DISTANCE_NORMAL = 400
     OTM_DISTANCE_HIGH_VIX = 450
@@ -7,11 +7,13 @@ Console Dashboard - COMPLETE FIXED VERSION
 ✅ ALL dashboard classes included
 """
 
+import logging
 import os
 import sys
 import time
 from colorama import Fore, Style, init
 from datetime import datetime
+from typing import List
 
 from .models import MarketData
 from .trade_manager import TradeManager
@@ -19,15 +21,44 @@ from .trade_manager import TradeManager
 init(autoreset=True)
 
 
+class _RepaintOnLog(logging.Filter):
+    """Flags the dashboard for a full repaint whenever a log record goes out"""
+
+    def __init__(self, dashboard: 'ConsoleDashboard'):
+        super().__init__()
+        self.dashboard = dashboard
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.dashboard.invalidate()
+        return True
+
+
 class ConsoleDashboard:
+    # Screen row where the live data block starts (below the 3-line header)
+    DATA_START_ROW = 4
+    # Redraw every row at least this often, even if no foreign output was seen
+    FULL_REPAINT_INTERVAL = 10.0
+
     def __init__(self):
         self.last_update = 0
         self.update_interval = 1.0
-        self.is_first_render = True
+        self._prev_lines: List[str] = []
+        self._needs_full_repaint = True
+        self._last_full_repaint = 0.0
+
+        # Console log lines print at the parked cursor and can scroll the
+        # screen, so any record going through the root handlers forces a repaint
+        self._log_filter = _RepaintOnLog(self)
+        for handler in logging.getLogger().handlers:
+            handler.addFilter(self._log_filter)
 
         self._clear_screen()
         self._print_header()
 
+    def invalidate(self):
+        """Forget the previous frame so the next render redraws the whole block"""
+        self._needs_full_repaint = True
+
     def _clear_screen(self):
         os.system('cls' if os.name == 'nt' else 'clear')
 
@@ -36,13 +67,39 @@ class ConsoleDashboard:
         print(f"{Fore.CYAN}  NIFTY OPTIONS TRADING SYSTEM - DYNAMIC GREEKS MONITOR{Style.RESET_ALL}")
         print(f"{Fore.CYAN}{'=' * 110}{Style.RESET_ALL}\n")
 
-    def _move_to_data_start(self):
-        sys.stdout.write('\033[4;0H')
-        sys.stdout.flush()
+    def _write_changed_lines(self, lines: List[str]):
+        """
+        Diffing renderer: only rows that differ from the previous frame are
+        rewritten (cursor-addressed), instead of clearing and reprinting the
+        whole block every tick. Falls back to a full repaint when something
+        else may have written to the terminal, and on a timer.
+        """
+        now = time.time()
+        if self._needs_full_repaint or now - self._last_full_repaint >= self.FULL_REPAINT_INTERVAL:
+            self._needs_full_repaint = False
+            self._last_full_repaint = now
+            self._prev_lines = []
+            # Back to the top of the data block and clear whatever scrolled in below it
+            sys.stdout.write(f"\033[{self.DATA_START_ROW};1H\033[J")
+
+        out = []
+        prev = self._prev_lines
+        for i, line in enumerate(lines):
+            if i < len(prev) and prev[i] == line:
+                continue
+            out.append(f"\033[{self.DATA_START_ROW + i};1H\033[2K{line}")
+
+        # Frame got shorter - wipe leftover rows from the previous frame
+        if len(lines) < len(prev):
+            out.append(f"\033[{self.DATA_START_ROW + len(lines)};1H\033[J")
+
+        if out:
+            # Park the cursor below the frame so other output doesn't overwrite it
+            out.append(f"\033[{self.DATA_START_ROW + len(lines)};1H")
+            sys.stdout.write(''.join(out))
+            sys.stdout.flush()
 
-    def _clear_to_end(self):
-        sys.stdout.write('\033[J')
-        sys.stdout.flush()
+        self._prev_lines = lines
 
     def _get_delta_status(self, delta: float, vix: float = None) -> tuple:
         """DYNAMIC Delta Status - Adjusts thresholds based on VIX"""
@@ -114,10 +171,6 @@ class ConsoleDashboard:
         if current_time - self.last_update < self.update_interval:
             return
 
-        if not self.is_first_render:
-            self._move_to_data_start()
-            self._clear_to_end()
-
         output_lines = []
 
         # Market data line
@@ -262,10 +315,9 @@ class ConsoleDashboard:
         output_lines.append(f"{Fore.CYAN}{'─' * 110}{Style.RESET_ALL}")
         output_lines.append(f"{Fore.YELLOW}Press Ctrl+C to stop gracefully{Style.RESET_ALL}")
 
-        print('\n'.join(output_lines), flush=True)
+        self._write_changed_lines(output_lines)
 
         self.last_update = current_time
-        self.is_first_render = False
 
 
 class ConsoleDashboardCompact:
@@ -4,19 +4,31 @@ Database management with exit reason tracking
 
 import sqlite3
 from datetime import datetime
-from typing import Any
+from typing import Any, List, Tuple
 import pandas as pd
 
 from .models import Trade
 
 
 class DatabaseManager:
-    def __init__(self, db_file: str):
+    TRADE_INSERT = '''
+            INSERT OR REPLACE INTO trades 
+            (trade_id, symbol, qty, direction, entry_price, exit_price, entry_time, exit_time, 
+             option_type, pnl, pnl_pct, strike_price, rolled_from, exit_reason)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+
+    def __init__(self, db_file: str, trade_batch_size: int = 1):
         self.conn = sqlite3.connect(db_file)
+        # Rows buffered by save_trade; 1 = write-through (live trading)
+        self.trade_batch_size = max(1, trade_batch_size)
+        self._trade_buffer: List[tuple] = []
         self.create_tables()
 
     def create_tables(self):
         cursor = self.conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
 
         # Enhanced trades table with exit_reason column
         cursor.execute('''
@@ -60,8 +72,6 @@ class DatabaseManager:
 
     def save_trade(self, trade: Trade, exit_price: float = None,
                    exit_time: datetime = None, exit_reason: str = None):
-        cursor = self.conn.cursor()
-
         pnl = None
         pnl_pct = None
         if exit_price:
@@ -69,12 +79,7 @@ class DatabaseManager:
             pnl = trade.get_pnl()
             pnl_pct = trade.get_pnl_pct()
 
-        cursor.execute('''
-            INSERT OR REPLACE INTO trades 
-            (trade_id, symbol, qty, direction, entry_price, exit_price, entry_time, exit_time, 
-             option_type, pnl, pnl_pct, strike_price, rolled_from, exit_reason)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        self._trade_buffer.append((
             trade.trade_id, trade.symbol, trade.qty, trade.direction.value,
             trade.entry_price, exit_price,
             trade.timestamp.isoformat(),
@@ -85,39 +90,64 @@ class DatabaseManager:
             trade.rolled_from,
             exit_reason
         ))
-        self.conn.commit()
-
-    def save_daily_performance(self, date_str: str, metrics: Any):
-        cursor = self.conn.cursor()
-
-        exit_reasons = metrics.exit_reasons if hasattr(metrics, 'exit_reasons') else {}
-
-        cursor.execute('''
+        if len(self._trade_buffer) >= self.trade_batch_size:
+            self.flush_trades()
+
+    def flush_trades(self):
+        """Write buffered trade rows with one executemany in one transaction"""
+        if not self._trade_buffer:
+            return
+        with self.conn:
+            self.conn.executemany(self.TRADE_INSERT, self._trade_buffer)
+        self._trade_buffer.clear()
+
+    DAILY_PERFORMANCE_INSERT = '''
             INSERT OR REPLACE INTO daily_performance 
             (date, total_trades, win_trades, total_pnl, ce_pnl, pe_pnl, max_drawdown, 
              profit_factor, sharpe_ratio, rolled_positions, profit_target_exits, 
              stop_loss_exits, time_exits)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        '''
+
+    @staticmethod
+    def _daily_performance_row(date_str: str, metrics: Any) -> tuple:
+        exit_reasons = metrics.exit_reasons if hasattr(metrics, 'exit_reasons') else {}
+        return (
             date_str, metrics.total_trades, metrics.win_trades, metrics.total_pnl,
             metrics.ce_pnl, metrics.pe_pnl, metrics.max_drawdown,
             metrics.profit_factor, metrics.sharpe_ratio, metrics.rolled_positions,
             exit_reasons.get('profit_target', 0),
             exit_reasons.get('stop_loss', 0),
             exit_reasons.get('time_square_off', 0)
-        ))
+        )
+
+    def save_daily_performance(self, date_str: str, metrics: Any):
+        cursor = self.conn.cursor()
+        cursor.execute(self.DAILY_PERFORMANCE_INSERT, self._daily_performance_row(date_str, metrics))
         self.conn.commit()
 
+    def save_daily_performance_bulk(self, entries: List[Tuple[str, Any]]):
+        """Insert many (date_str, metrics) rows with one executemany and one commit"""
+        if not entries:
+            return
+        with self.conn:
+            self.conn.executemany(
+                self.DAILY_PERFORMANCE_INSERT,
+                [self._daily_performance_row(date_str, metrics) for date_str, metrics in entries]
+            )
+
     def get_performance_history(self, days: int = 30) -> pd.DataFrame:
         query = f"SELECT * FROM daily_performance ORDER BY date DESC LIMIT {days}"
         return pd.read_sql_query(query, self.conn)
 
     def get_all_trades(self) -> pd.DataFrame:
+        self.flush_trades()
         query = "SELECT * FROM trades ORDER BY entry_time"
         return pd.read_sql_query(query, self.conn)
 
     def get_exit_reason_stats(self) -> pd.DataFrame:
         """Get statistics on exit reasons"""
+        self.flush_trades()
         query = """
             SELECT 
                 exit_reason,
@@ -133,4 +163,5 @@ class DatabaseManager:
         return pd.read_sql_query(query, self.conn)
 
     def close(self):
+        self.flush_trades()
         self.conn.close()
\ No newline at end of file
@@ -4,9 +4,11 @@ Save as: strangle/entry_logger.py
 FIXED: Added 'avg_vix' to the summary dict to match run.py
 """
 
+import atexit
 import csv
 import os
 import logging
+import time
 from datetime import datetime, date
 from typing import Optional, Dict, Any
 from pathlib import Path
@@ -16,11 +18,17 @@ import pandas as pd
 class EntryLogger:
     """Logs one-line entry decisions per day for easy triage"""
 
+    FLUSH_ROWS = 256  # buffered decisions written per file append
+    FLUSH_INTERVAL = 5.0  # seconds; upper bound on how long a decision sits in memory
+
     def __init__(self, log_file: str = "entry_decisions.csv"):
         self.log_file = log_file
         self.current_date = None
         self.entry_attempted_today = False
+        self._pending_rows = []
+        self._last_flush = time.monotonic()
         self._initialize_log()
+        atexit.register(self.flush)
 
     def _initialize_log(self):
         """Create log file with headers if it doesn't exist"""
@@ -60,24 +68,27 @@ class EntryLogger:
         pe_delta = 0.0
 
         try:
-            with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    current_date_str,
-                    current_time_str,
-                    approved,
-                    f"{market_data.india_vix:.2f}",
-                    f"{market_data.iv_rank:.1f}",
-                    f"{market_data.iv_percentile:.1f}",
-                    f"{market_data.nifty_spot:.2f}",
-                    ce_strike,
-                    pe_strike,
-                    ce_delta,
-                    pe_delta,
-                    f"{combined_premium:.2f}",
-                    lots,
-                    reason
-                ])
+            self._pending_rows.append([
+                current_date_str,
+                current_time_str,
+                approved,
+                f"{market_data.india_vix:.2f}",
+                f"{market_data.iv_rank:.1f}",
+                f"{market_data.iv_percentile:.1f}",
+                f"{market_data.nifty_spot:.2f}",
+                ce_strike,
+                pe_strike,
+                ce_delta,
+                pe_delta,
+                f"{combined_premium:.2f}",
+                lots,
+                reason
+            ])
+            # Approved entries go to disk at once; rejections are batched, bounded in rows and time
+            if approved == 'YES' or len(self._pending_rows) >= self.FLUSH_ROWS:
+                self.flush()
+            else:
+                self.flush_if_due()
 
             self.current_date = current_date_str
             if approved == 'YES':
@@ -86,8 +97,26 @@ class EntryLogger:
         except Exception as e:
             logging.error(f"Error logging entry decision: {e}")
 
+    def flush_if_due(self):
+        """Flush when buffered rows are older than FLUSH_INTERVAL (called every strategy cycle)"""
+        if self._pending_rows and time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Append buffered decisions to the CSV in one write"""
+        if not self._pending_rows:
+            return
+        try:
+            with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(self._pending_rows)
+            self._pending_rows.clear()
+            self._last_flush = time.monotonic()
+        except Exception as e:
+            logging.error(f"Error writing entry decisions: {e}")
+
     def reset_daily(self):
         """Call at the start of a new trading day"""
+        self.flush()
         self.entry_attempted_today = False
 
     def get_summary(self, days: int = 30) -> Dict[str, Any]:
@@ -101,6 +130,7 @@ class EntryLogger:
             "avg_vix": 0.0  # Default value
         }
 
+        self.flush()
         if not os.path.exists(self.log_file):
             logging.warning(f"Log file not found at {self.log_file}. Returning empty summary.")
             return default_summary
@@ -158,6 +188,7 @@ class EntryLogger:
 
     def print_recent(self, days: int = 10):
         """Print recent entry decisions"""
+        self.flush()
         if not os.path.exists(self.log_file):
             print("No entry log found")
             return
@@ -83,8 +83,9 @@ class Trade:
             pass
         return 0.0
 
-    def update_price(self, price: float, greeks: Optional[Greeks] = None):
-        """Update price and greeks"""
+    def update_price(self, price: float, greeks: Optional[Greeks] = None) -> float:
+        """Update price and greeks. Returns the P&L change caused by this update."""
+        previous_pnl = self.get_pnl()
         self.current_price = price
         if greeks:
             self.greeks = greeks
@@ -94,6 +95,8 @@ class Trade:
         if current_pnl > self.highest_profit:
             self.highest_profit = current_pnl
 
+        return current_pnl - previous_pnl
+
     def get_pnl(self) -> float:
         """Calculate P&L in Rupees"""
         premium_diff = self.entry_price - self.current_price
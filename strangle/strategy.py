@@ -627,6 +627,8 @@ class ShortStrangleStrategy:
         self.market_data.iv_rank = self.calculate_iv_rank()
 
         self.run_entry_cycle()
+        # Buffered decisions reach the CSV within FLUSH_INTERVAL even when no new ones arrive
+        self.entry_logger.flush_if_due()
 
         if self.trade_manager.active_trades:
             self.trade_manager.update_active_trades(self.market_data)
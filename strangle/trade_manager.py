@@ -17,6 +17,8 @@ from .broker import BrokerInterface
 from .db import DatabaseManager
 from .notifier import NotificationManager
 
+_log = logging.getLogger(__name__)
+
 
 class TradeManager:
     def __init__(self, broker: BrokerInterface, db: DatabaseManager, notifier: NotificationManager):
@@ -45,7 +47,9 @@ class TradeManager:
         self.ce_trades = 0
         self.pe_trades = 0
         self.rolled_positions = 0
-        self.daily_pnl_history = []
+        # Closed-day P&L in a growable float64 buffer (+1 spare slot for today)
+        self._pnl_buf = np.empty(64, dtype=np.float64)
+        self._pnl_len = 0
         self.active_pairs: Dict[str, Dict] = {}
 
         self.exit_reasons = {
@@ -66,17 +70,20 @@ class TradeManager:
         self.active_trades[trade.trade_id] = trade
         self.total_trades += 1
         self.last_entry_timestamp = trade.timestamp
-        logging.info(f"Entry timestamp recorded: {self.last_entry_timestamp}")
+        _log.info("Entry timestamp recorded: %s", self.last_entry_timestamp)
 
         if trade.option_type == "CE":
             self.ce_trades += 1
         else:
             self.pe_trades += 1
 
-        greeks_str = f" {trade.greeks}" if trade.greeks else ""
-        logging.info(
-            f"TRADE ADDED: {trade.direction.value} {trade.qty}lots {trade.symbol} "
-            f"@ Rs.{trade.entry_price:.2f}{greeks_str}"
+        # Trades may arrive already marked to market (e.g. spreads)
+        self._add_unrealized_pnl(trade.option_type, trade.get_pnl())
+
+        _log.info(
+            "TRADE ADDED: %s %slots %s @ Rs.%.2f%s",
+            trade.direction.value, trade.qty, trade.symbol, trade.entry_price,
+            f" {trade.greeks}" if trade.greeks else ""
         )
 
     def update_active_trades(self, market_data: MarketData):
@@ -90,19 +97,13 @@ class TradeManager:
         vix = market_data.india_vix
 
         if vix <= 0 or pd.isna(vix):
-            logging.warning(f"Invalid VIX ({vix}). Skipping updates.")
+            _log.warning("Invalid VIX (%s). Skipping updates.", vix)
             return
 
         if spot <= 0 or pd.isna(spot):
-            logging.warning(f"Invalid Spot ({spot}). Skipping updates.")
+            _log.warning("Invalid Spot (%s). Skipping updates.", spot)
             return
 
-        # ═══════════════════════════════════════════════════════════════
-        # FIX: Reset unrealized P&L before recalculating
-        # ═══════════════════════════════════════════════════════════════
-        self.unrealized_ce_pnl = 0.0
-        self.unrealized_pe_pnl = 0.0
-
         for trade in self.active_trades.values():
             current_price = 0.0
             greeks = None
@@ -113,7 +114,7 @@ class TradeManager:
                     current_price = self.broker.get_quote(trade.symbol)
 
                     if current_price > 5000:
-                        logging.error(f"UNREALISTIC PRICE for {trade.symbol}: {current_price:.2f}")
+                        _log.error("UNREALISTIC PRICE for %s: %.2f", trade.symbol, current_price)
                         current_price = trade.entry_price
 
                     if current_price < 0:
@@ -140,7 +141,7 @@ class TradeManager:
                     )
 
                     if current_price > 5000:
-                        logging.error(f"UNREALISTIC PRICE: {current_price:.2f}")
+                        _log.error("UNREALISTIC PRICE: %.2f", current_price)
                         current_price = trade.entry_price
                         greeks = None
 
@@ -149,22 +150,14 @@ class TradeManager:
                         greeks = None
 
             except Exception as e:
-                logging.error(f"Error updating {trade.symbol}: {e}", exc_info=True)
+                _log.error("Error updating %s: %s", trade.symbol, e, exc_info=True)
                 current_price = trade.entry_price
                 greeks = None
 
             if current_price >= 0:
-                trade.update_price(current_price, greeks)
-
-                # ═══════════════════════════════════════════════════════════
-                # FIX: Calculate and accumulate unrealized P&L
-                # ═══════════════════════════════════════════════════════════
-                current_pnl = trade.get_pnl()
-
-                if trade.option_type == "CE":
-                    self.unrealized_ce_pnl += current_pnl
-                else:
-                    self.unrealized_pe_pnl += current_pnl
+                # Unrealized P&L is maintained incrementally from price deltas
+                pnl_delta = trade.update_price(current_price, greeks)
+                self._add_unrealized_pnl(trade.option_type, pnl_delta)
 
         # ═══════════════════════════════════════════════════════════════
         # FIX: Update total P&L for display (realized + unrealized)
@@ -180,12 +173,12 @@ class TradeManager:
 
             if time_since_entry < self.entry_grace_period_minutes:
                 if not self._grace_logged:
-                    logging.info(f"⏱️ Grace period: {time_since_entry:.1f}/{self.entry_grace_period_minutes} min")
+                    _log.info("⏱️ Grace period: %.1f/%s min", time_since_entry, self.entry_grace_period_minutes)
                     self._grace_logged = True
                 return
             else:
                 if self._grace_logged:
-                    logging.info(f"✅ Grace period expired. Enabling stop-loss.")
+                    _log.info("✅ Grace period expired. Enabling stop-loss.")
                     self._grace_logged = False
 
         for trade_id in list(self.active_trades.keys()):
@@ -251,6 +244,9 @@ class TradeManager:
         else:
             self.realized_pe_pnl += pnl
 
+        # Leg moves from unrealized to realized (before save_trade re-marks it)
+        self._add_unrealized_pnl(trade.option_type, -trade.get_pnl())
+
         if pnl > 0:
             self.win_trades += 1
 
@@ -268,13 +264,12 @@ class TradeManager:
 
         self.notifier.notify_exit(reason, trade.symbol, trade.entry_price, exit_price, pnl, pnl_pct, holding_time)
 
-        logging.warning(f"LEG CLOSED: {trade.symbol} | P&L=Rs.{pnl:+,.2f} | {reason}")
+        _log.warning("LEG CLOSED: %s | P&L=Rs.%+.2f | %s", trade.symbol, pnl, reason)
 
         # Remove from active trades
         del self.active_trades[trade_id]
 
-        # Recalculate total P&L (will happen on next update_active_trades)
-        # For immediate update:
+        # Immediate update of display totals
         self.ce_pnl = self.realized_ce_pnl + self.unrealized_ce_pnl
         self.pe_pnl = self.realized_pe_pnl + self.unrealized_pe_pnl
         self.daily_pnl = self.ce_pnl + self.pe_pnl
@@ -284,6 +279,24 @@ class TradeManager:
             if trade_id in [meta['ce_id'], meta['pe_id']]:
                 self.remove_trade_pair(pair_id)
 
+    def _add_unrealized_pnl(self, option_type: str, pnl_delta: float):
+        if option_type == "CE":
+            self.unrealized_ce_pnl += pnl_delta
+        else:
+            self.unrealized_pe_pnl += pnl_delta
+
+    def resync_unrealized_pnl(self):
+        """Rebuild the cached unrealized P&L from scratch (after bulk changes to active_trades)"""
+        self.unrealized_ce_pnl = 0.0
+        self.unrealized_pe_pnl = 0.0
+        for trade in self.active_trades.values():
+            self._add_unrealized_pnl(trade.option_type, trade.get_pnl())
+
+    @property
+    def total_pnl(self) -> float:
+        """Cached P&L of all active positions (O(1), no walk over active_trades)"""
+        return self.unrealized_ce_pnl + self.unrealized_pe_pnl
+
     def add_trade_pair(self, ce_trade_id: str, pe_trade_id: str, entry_combined: float,
                        entry_time: datetime, lots: int, profit_target: float = None, stop_loss: float = None):
         pair_id = f"{ce_trade_id}|{pe_trade_id}"
@@ -357,7 +370,9 @@ class TradeManager:
     def reset_daily_metrics(self):
         """Reset daily metrics (keep realized P&L until reset)"""
         if self.daily_pnl != 0 or len(self.active_trades) > 0:
-            self.daily_pnl_history.append(self.daily_pnl)
+            self._ensure_pnl_capacity(self._pnl_len + 2)
+            self._pnl_buf[self._pnl_len] = self.daily_pnl
+            self._pnl_len += 1
 
         # Reset daily totals
         self.daily_pnl = 0.0
@@ -367,8 +382,8 @@ class TradeManager:
         # Reset realized P&L for new day
         self.realized_ce_pnl = 0.0
         self.realized_pe_pnl = 0.0
-        self.unrealized_ce_pnl = 0.0
-        self.unrealized_pe_pnl = 0.0
+        # Positions carried into the new day keep their open P&L
+        self.resync_unrealized_pnl()
 
         self.total_trades = 0
         self.win_trades = 0
@@ -379,6 +394,16 @@ class TradeManager:
         self.last_entry_timestamp = None
         self._grace_logged = False
 
+    @property
+    def daily_pnl_history(self) -> np.ndarray:
+        """P&L of each closed trading day (view into the internal buffer)"""
+        return self._pnl_buf[:self._pnl_len]
+
+    def _ensure_pnl_capacity(self, size: int):
+        if size > self._pnl_buf.shape[0]:
+            # Geometric growth keeps appends amortised O(1)
+            self._pnl_buf = np.resize(self._pnl_buf, max(size, 2 * self._pnl_buf.shape[0]))
+
     def get_performance_metrics(self) -> Any:
         class Metrics:
             pass
@@ -392,21 +417,20 @@ class TradeManager:
         metrics.rolled_positions = self.rolled_positions
         metrics.exit_reasons = self.exit_reasons.copy()
 
-        history = self.daily_pnl_history + [self.daily_pnl]
-        if history:
-            cumulative = np.cumsum(history)
-            running_max = np.maximum.accumulate(cumulative)
-            drawdown = cumulative - running_max
-            metrics.max_drawdown = abs(np.min(drawdown)) if len(drawdown) > 0 else 0.0
-
-            profits = [p for p in history if p > 0]
-            losses = [abs(p) for p in history if p < 0]
-            total_profit = sum(profits) if profits else 0
-            total_loss = sum(losses) if losses else 0
+        # One float64 array; every statistic below is a vectorised reduction over it
+        self._pnl_buf[self._pnl_len] = self.daily_pnl  # spare slot: no list->array copy
+        returns = self._pnl_buf[:self._pnl_len + 1]
+        if returns.size:
+            cumulative = np.cumsum(returns)
+            drawdown = cumulative - np.maximum.accumulate(cumulative)
+            metrics.max_drawdown = abs(drawdown.min())
+
+            total_profit = returns[returns > 0].sum()
+            total_loss = -returns[returns < 0].sum()
             metrics.profit_factor = total_profit / total_loss if total_loss > 0 else 999.0
 
-            returns = np.array(history)
-            metrics.sharpe_ratio = np.mean(returns) / np.std(returns) * np.sqrt(252) if np.std(returns) > 0 else 0.0
+            std = returns.std()
+            metrics.sharpe_ratio = returns.mean() / std * np.sqrt(252) if std > 0 else 0.0
         else:
             metrics.max_drawdown = 0.0
             metrics.profit_factor = 0.0
@@ -4,6 +4,7 @@ FIXED: Removed duplicate function definitions.
 """
 
 from datetime import datetime, date, time as dt_time
+from functools import lru_cache
 from typing import Optional, Tuple
 import numpy as np
 import re
@@ -19,31 +20,37 @@ class Utils:
 
     @staticmethod
     def is_market_hours(backtest_timestamp: Optional[datetime] = None) -> bool:
-        now = Utils.get_now(backtest_timestamp).time()
-        start = dt_time.fromisoformat(Config.MARKET_START)
-        end = dt_time.fromisoformat(Config.MARKET_END)
-        return start <= now <= end
+        return Utils._session_check(backtest_timestamp, Config.MARKET_START, Config.MARKET_END)
 
     @staticmethod
     def is_entry_window(backtest_timestamp: Optional[datetime] = None) -> bool:
-        now = Utils.get_now(backtest_timestamp).time()
-        start = dt_time.fromisoformat(Config.ENTRY_START)
-        stop = dt_time.fromisoformat(Config.ENTRY_STOP)
-        return start <= now <= stop
+        return Utils._session_check(backtest_timestamp, Config.ENTRY_START, Config.ENTRY_STOP)
 
     @staticmethod
     def is_square_off_time(backtest_timestamp: Optional[datetime] = None) -> bool:
-        now = Utils.get_now(backtest_timestamp).time()
         # Use the new SQUARE_OFF_TIME from config
-        square_off = dt_time.fromisoformat(Config.SQUARE_OFF_TIME)
-        return now >= square_off
+        return Utils._session_check(backtest_timestamp, Config.SQUARE_OFF_TIME, None)
+
+    @staticmethod
+    def _session_check(backtest_timestamp: Optional[datetime], start: str, end: Optional[str]) -> bool:
+        if backtest_timestamp is None:
+            # Live clock: every reading is distinct, so don't let it fill the cache
+            return Utils._time_in_session.__wrapped__(datetime.now().time(), start, end)
+        return Utils._time_in_session(backtest_timestamp.time(), start, end)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _time_in_session(now: dt_time, start: str, end: Optional[str]) -> bool:
+        # Memoised per time of day (a backtest day repeats the same few hundred bars);
+        # the config strings are part of the key, so edits to Config still apply
+        if now < dt_time.fromisoformat(start):
+            return False
+        return end is None or now <= dt_time.fromisoformat(end)
 
     @staticmethod
     def is_holiday(backtest_date: Optional[date] = None) -> bool:
-        if backtest_date:
-            return backtest_date.weekday() in [5, 6]
-        today = datetime.now().date()
-        return today.weekday() in [5, 6]
+        check_date = backtest_date if backtest_date else datetime.now().date()
+        return check_date.weekday() in (5, 6) or check_date.isoformat() in Config.MARKET_HOLIDAYS
 
     @staticmethod
     def generate_id(length: int = 6) -> str: